@@ -0,0 +1,5 @@
+#!/bin/bash
+
+readonly ROOT_DIR="$(readlink -m "$(dirname "${0}")")"
+
+cd "${ROOT_DIR}" && exec python3 -m benchmark "${@}"
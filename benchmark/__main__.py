@@ -0,0 +1,84 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from .compare import compare
+from .repository import Scenario
+from .suite import Suite
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        prog='benchmark',
+        description='Times the branch tree pipeline on synthetic repositories.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='Runs the suite.')
+    run.add_argument('--branches', type=int, default=50)
+    run.add_argument('--depth', type=int, default=3)
+    run.add_argument('--merges', type=float, default=0.1)
+    run.add_argument('--history', type=int, default=10000)
+    run.add_argument('--aliases', type=int, default=5)
+    run.add_argument('--remotes', type=int, default=10)
+    run.add_argument('--commits', type=int, default=3)
+    run.add_argument('--seed', type=int, default=0)
+    run.add_argument('--repeat', type=int, default=5)
+    run.add_argument('--include-commits', action='store_true')
+    run.add_argument('--output', help='Writes the results to a JSON file.')
+
+    diff = commands.add_parser(
+        'compare', help='Compares two result files.')
+    diff.add_argument('baseline')
+    diff.add_argument('current')
+    diff.add_argument('--threshold', type=float, default=0.1)
+    return parser.parse_args()
+
+
+def revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True
+        ).stdout.decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(arguments):
+    scenario = Scenario(
+        branches=arguments.branches, depth=arguments.depth,
+        merges=arguments.merges, history=arguments.history,
+        aliases=arguments.aliases, remotes=arguments.remotes,
+        commits=arguments.commits, seed=arguments.seed)
+    results = Suite(
+        scenario, arguments.repeat, arguments.include_commits).run()
+    results['revision'] = revision()
+
+    for phase, timing in results['phases'].items():
+        print('{0:<8} {1:>10.4f}s wall {2:>10.4f}s cpu'.format(
+            phase, timing['wall'], timing['cpu']))
+    if arguments.output is not None:
+        with open(arguments.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    return 0
+
+
+def compare_results(arguments):
+    with open(arguments.baseline, 'r') as file:
+        baseline = json.load(file)
+    with open(arguments.current, 'r') as file:
+        current = json.load(file)
+
+    lines, regressions = compare(baseline, current, arguments.threshold)
+    print('\n'.join(lines))
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    if arguments.command == 'run':
+        sys.exit(run_suite(arguments))
+    sys.exit(compare_results(arguments))
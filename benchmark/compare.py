@@ -0,0 +1,21 @@
+PHASE_TEMPLATE = '{0:<8} {1:>10.4f}s {2:>10.4f}s {3:>+8.1%}  {4}'
+HEADER_TEMPLATE = '{0:<8} {1:>11} {2:>11} {3:>8}'
+
+
+def compare(baseline, current, threshold):
+    lines = [HEADER_TEMPLATE.format('phase', 'baseline', 'current', 'change')]
+    regressions = []
+    phases = current.get('phases', {})
+    for phase, timing in baseline.get('phases', {}).items():
+        if phase not in phases:
+            continue
+        before, after = timing['wall'], phases[phase]['wall']
+        change = (after - before) / before if before > 0 else 0.0
+        is_regression = change > threshold
+        if is_regression:
+            regressions.append(phase)
+        lines.append(PHASE_TEMPLATE.format(
+            phase, before, after, change,
+            'REGRESSION' if is_regression else ''
+        ).rstrip())
+    return lines, regressions
@@ -0,0 +1,173 @@
+import os
+import random
+import shutil
+import tempfile
+
+from subprocess import PIPE
+from subprocess import run
+
+
+ENVIRONMENT = {
+    'GIT_AUTHOR_NAME': 'Branch',
+    'GIT_AUTHOR_EMAIL': 'branch@example.com',
+    'GIT_COMMITTER_NAME': 'Branch',
+    'GIT_COMMITTER_EMAIL': 'branch@example.com',
+    'GIT_CONFIG_NOSYSTEM': '1'
+}
+START_TIME = 1500000000
+IDENTITY = 'Branch <branch@example.com>'
+
+
+class Scenario:
+
+    def __init__(self, branches=10, depth=1, merges=0.0, history=1000,
+                 aliases=0, remotes=0, commits=3, seed=0):
+        self._branches = branches
+        self._depth = max(1, depth)
+        self._merges = merges
+        self._history = max(1, history)
+        self._aliases = aliases
+        self._remotes = remotes
+        self._commits = max(1, commits)
+        self._seed = seed
+
+    @property
+    def branches(self):
+        return self._branches
+
+    @property
+    def depth(self):
+        return self._depth
+
+    @property
+    def merges(self):
+        return self._merges
+
+    @property
+    def history(self):
+        return self._history
+
+    @property
+    def aliases(self):
+        return self._aliases
+
+    @property
+    def remotes(self):
+        return self._remotes
+
+    @property
+    def commits(self):
+        return self._commits
+
+    @property
+    def seed(self):
+        return self._seed
+
+    def to_dict(self):
+        return {
+            'branches': self._branches,
+            'depth': self._depth,
+            'merges': self._merges,
+            'history': self._history,
+            'aliases': self._aliases,
+            'remotes': self._remotes,
+            'commits': self._commits,
+            'seed': self._seed
+        }
+
+
+class SyntheticRepository:
+
+    def __init__(self, scenario):
+        self._scenario = scenario
+        self._path = None
+
+    @property
+    def path(self):
+        return self._path
+
+    def __enter__(self):
+        self._path = tempfile.mkdtemp(prefix='branch-benchmark-')
+        try:
+            self._git('init', '--quiet', '--initial-branch=master')
+            self._git('fast-import', '--quiet', input=self._stream())
+            self._git('reset', '--quiet', '--hard', 'master')
+        except Exception:
+            shutil.rmtree(self._path, ignore_errors=True)
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        shutil.rmtree(self._path, ignore_errors=True)
+
+    def _stream(self):
+        return ''.join(FastImportWriter(self._scenario).write()).encode()
+
+    def _git(self, *command, input=None):
+        environment = dict(os.environ, **ENVIRONMENT)
+        environment['HOME'] = self._path
+        process = run(
+            ('git',) + command, cwd=self._path, env=environment,
+            input=input, stdout=PIPE, stderr=PIPE)
+        process.check_returncode()
+        return process.stdout.decode('utf-8')
+
+
+class FastImportWriter:
+
+    def __init__(self, scenario):
+        self._scenario = scenario
+        self._random = random.Random(scenario.seed)
+        self._mark = 0
+
+    def write(self):
+        scenario = self._scenario
+        history = []
+        for _ in range(scenario.history):
+            parent = history[-1] if len(history) > 0 else None
+            yield from self._commit('refs/heads/master', parent)
+            history.append(self._mark)
+
+        # Stacks fork from the recent part of the history, like feature
+        # branches which have not been rebased for a while.
+        tips, recent = [], history[-max(1, len(history) // 10):]
+        stacks = (scenario.branches + scenario.depth - 1) // scenario.depth
+        for stack in range(stacks):
+            parent = self._random.choice(recent)
+            for level in range(scenario.depth):
+                if len(tips) == scenario.branches:
+                    break
+                name = 'stack-{}-{}'.format(stack, level)
+                for _ in range(scenario.commits):
+                    merge = None
+                    if self._random.random() < scenario.merges:
+                        merge = self._random.choice(recent)
+                    yield from self._commit(
+                        'refs/heads/' + name, parent, merge)
+                    parent = self._mark
+                tips.append((name, parent))
+
+        for index in range(min(scenario.aliases, len(tips))):
+            _, mark = self._random.choice(tips)
+            yield from self._reset('refs/heads/alias-{}'.format(index), mark)
+
+        yield from self._reset('refs/remotes/origin/master', history[-1])
+        for name, mark in tips[:scenario.remotes]:
+            yield from self._reset('refs/remotes/origin/' + name, mark)
+
+    def _commit(self, ref, parent, merge=None):
+        self._mark += 1
+        message = 'Change {}\n'.format(self._mark)
+        content = '{}\n'.format(self._mark)
+        yield 'commit {}\nmark :{}\n'.format(ref, self._mark)
+        yield 'committer {} {} +0000\n'.format(
+            IDENTITY, START_TIME + 60 * self._mark)
+        yield 'data {}\n{}'.format(len(message), message)
+        if parent is not None:
+            yield 'from :{}\n'.format(parent)
+        if merge is not None and merge != parent:
+            yield 'merge :{}\n'.format(merge)
+        yield 'M 644 inline file\ndata {}\n{}\n'.format(len(content), content)
+
+    def _reset(self, ref, mark):
+        yield 'reset {}\nfrom :{}\n\n'.format(ref, mark)
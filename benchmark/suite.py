@@ -0,0 +1,117 @@
+import os
+import statistics
+import time
+
+from subprocess import PIPE
+from subprocess import run
+
+from branch.controller import FixedController
+from branch.engine import Engine
+from branch.git import Git
+from branch.git import LOG_FIELDS
+from branch.git import LOG_FORMAT
+from branch.git import LogEntry
+from branch.git import TreeBuilder
+from branch.git import TreeReader
+from branch.renderer import TreeRenderer
+
+from .repository import SyntheticRepository
+
+
+PHASES = ['log', 'parse', 'read', 'build', 'render', 'engine', 'cached']
+
+
+class NullDisplay:
+
+    def message(self, *parts, type=None):
+        pass
+
+    def render(self, rendering):
+        for _ in rendering:
+            pass
+
+
+class Timing:
+
+    def __init__(self):
+        self._walls = []
+        self._cpus = []
+
+    def measure(self, function):
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = function()
+        self._walls.append(time.perf_counter() - wall)
+        self._cpus.append(time.process_time() - cpu)
+        return result
+
+    def to_dict(self):
+        return {
+            'wall': statistics.median(self._walls),
+            'cpu': statistics.median(self._cpus),
+            'runs': len(self._walls)
+        }
+
+
+class Suite:
+
+    def __init__(self, scenario, repeat=5, include_commits=False):
+        self._scenario = scenario
+        self._repeat = max(1, repeat)
+        self._include_commits = include_commits
+
+    def run(self):
+        timings = {phase: Timing() for phase in PHASES}
+        with SyntheticRepository(self._scenario) as repository:
+            git = Git(repository.path)
+            head, branches = git._head(), list(git._branches())
+            fields = Suite._read_fields(repository.path)
+            for _ in range(self._repeat):
+                entries = timings['log'].measure(lambda: self._stream(git))
+                timings['parse'].measure(lambda: Suite._parse(fields))
+                data = timings['read'].measure(
+                    lambda: TreeReader().read(head, branches, iter(entries)))
+                tree = timings['build'].measure(
+                    lambda: TreeBuilder.build_tree(data, False))
+                timings['render'].measure(lambda: Suite._render(tree))
+                # Every engine run starts without the graph cache, the
+                # cached phase then times the run that reuses it.
+                Suite._remove_cache(git)
+                timings['engine'].measure(lambda: self._run_engine(git))
+                timings['cached'].measure(lambda: self._run_engine(git))
+
+        return {
+            'scenario': self._scenario.to_dict(),
+            'commits': len(entries),
+            'phases': {
+                phase: timing.to_dict() for phase, timing in timings.items()
+            }
+        }
+
+    def _stream(self, git):
+        with git._log() as log:
+            return list(log)
+
+    def _read_fields(path):
+        process = run(
+            ['git', 'log', '-z', '--all', LOG_FORMAT], cwd=path, stdout=PIPE)
+        process.check_returncode()
+        return process.stdout.decode('latin-1').split('\0')[:-1]
+
+    def _parse(fields):
+        columns = [fields[i::LOG_FIELDS] for i in range(LOG_FIELDS)]
+        return list(map(LogEntry.parse_fields, *columns))
+
+    def _render(tree):
+        return sum(1 for _ in TreeRenderer().render_tree(tree))
+
+    def _remove_cache(git):
+        try:
+            os.remove(git._cache_path())
+        except FileNotFoundError:
+            pass
+
+    def _run_engine(self, git):
+        options = {'commits': self._include_commits}
+        Engine(
+            Git(git._path), NullDisplay(), FixedController(None, options)
+        ).run()
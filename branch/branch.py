@@ -1,5 +1,7 @@
 class Stage:
 
+    __slots__ = ('_staged', '_unstaged', '_untracked')
+
     def __init__(self, staged, unstaged, untracked):
         self._staged = staged
         self._unstaged = unstaged
@@ -19,6 +21,12 @@ class Stage:
 
 
 class Branch:
+
+    __slots__ = (
+        '_ref', '_names', '_id', '_aliases', '_children', '_commits',
+        '_is_remote', '_is_active', '_stage'
+    )
+
     def __init__(self, ref, names, commits):
         self._ref = ref
         self._names = names
@@ -0,0 +1,73 @@
+import os
+
+
+class GraphCache:
+
+    VERSION = 2
+
+    def __init__(self, path):
+        self._path = path
+        self._tips = set()
+        self._entries = []
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def tips(self):
+        return self._tips
+
+    @property
+    def entries(self):
+        return self._entries
+
+    def load(self):
+        import json
+
+        try:
+            with open(self._path, 'r') as file:
+                content = json.load(file)
+        except (OSError, ValueError):
+            return self
+
+        if content.get('version') != GraphCache.VERSION:
+            return self
+
+        self._tips = set(content.get('tips', []))
+        self._entries = [
+            (commit, parents)
+            for commit, parents
+            in content.get('entries', [])
+        ]
+        return self
+
+    def save(self, tips, entries):
+        import json
+
+        self._tips = set(tips)
+        self._entries = list(entries)
+        content = {
+            'version': GraphCache.VERSION,
+            'tips': sorted(self._tips),
+            'entries': self._entries
+        }
+
+        directory = os.path.dirname(self._path)
+        temporary = '{}.{}'.format(self._path, os.getpid())
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(temporary, 'w') as file:
+                json.dump(content, file, separators=(',', ':'))
+            os.replace(temporary, self._path)
+        except OSError:
+            return False
+        return True
+
+    def clear(self):
+        self._tips = set()
+        self._entries = []
+        try:
+            os.remove(self._path)
+        except OSError:
+            pass
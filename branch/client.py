@@ -0,0 +1,79 @@
+import os
+
+from .refs import RefStore
+
+
+SOCKET_PATH = os.path.join('branch', 'daemon.sock')
+QUERY_FLAGS = {
+    '-c': 'commits',
+    '--commits': 'commits',
+    '-J': 'json',
+    '--json': 'json'
+}
+TIMEOUT = 5.0
+
+
+class Client:
+
+    def find(path=None):
+        store = RefStore.open(path)
+        if store is None:
+            return None
+        path = Client.socket_path(store.git_dir)
+        return Client(path) if os.path.exists(path) else None
+
+    def socket_path(git_dir):
+        return os.path.join(git_dir, SOCKET_PATH)
+
+    def parse(arguments):
+        # Only plain tree queries are answered by the daemon, everything
+        # else goes through the regular command line.
+        options = {'commits': False, 'json': False}
+        for argument in arguments:
+            option = QUERY_FLAGS.get(argument)
+            if option is None:
+                return None
+            options[option] = True
+        return {
+            'command': 'json' if options['json'] else 'render',
+            'commits': options['commits']
+        }
+
+    def __init__(self, path):
+        self._path = path
+
+    @property
+    def path(self):
+        return self._path
+
+    def is_running(self):
+        return self.request({'command': 'ping'}) is not None
+
+    def request(self, message):
+        # Most calls find no socket, so they never pay for these imports.
+        import json
+        import socket
+
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stream:
+                stream.settimeout(TIMEOUT)
+                stream.connect(self._path)
+                stream.sendall(json.dumps(message).encode('utf-8') + b'\n')
+                stream.shutdown(socket.SHUT_WR)
+                response = Client._receive(stream)
+        except (OSError, ValueError):
+            return None
+        if response.get('error') is not None:
+            return None
+        return response
+
+    def _receive(stream):
+        import json
+
+        chunks = []
+        while True:
+            chunk = stream.recv(1 << 16)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return json.loads(b''.join(chunks).decode('utf-8'))
@@ -0,0 +1,53 @@
+from .controller import Command
+from .controller import FlagOption
+from .controller import Option
+
+
+PROGRAM_HELP = 'Used to view and manage local git branches.'
+PULL_COMMAND_HELP = 'Pulls all remote branches and rebases local ones over' + \
+    ' their respective parrents.'
+WIPE_COMMAND_HELP = 'Deletes all local alias branches.'
+DAEMON_COMMAND_HELP = 'Keeps the branch tree of the repository in memory' + \
+    ' and serves it to later calls over a socket.'
+
+COMMITS_OPTION_HELP = 'Displays commits in the branch tree.'
+BOUNDED_OPTION_HELP = 'Reads only the history above the merge base of' + \
+    ' the local branches.'
+WIPE_OPTION_HELP = 'Invokes the wipe command after the pull finishes.'
+REPLAY_OPTION_HELP = 'Rebases branches without checking them out, falling' + \
+    ' back to a regular rebase on conflicts.'
+JOBS_OPTION_HELP = 'Rebases independent branches in parallel, using up to' + \
+    ' JOBS temporary worktrees.'
+JSON_OPTION_HELP = 'Prints the branch tree as JSON.'
+WATCH_OPTION_HELP = 'Keeps the branch tree on screen and redraws it' + \
+    ' whenever the refs or the index change.'
+TRACKED_OPTION_HELP = 'Skips the scan for untracked files when looking' + \
+    ' for changes in the working tree.'
+WORKSPACE_OPTION_HELP = 'Runs the command in the repository WORKSPACE, or' + \
+    ' in every repository directly below it. May be given several times.'
+STOP_OPTION_HELP = 'Stops the daemon of the repository.'
+TRACE_OPTION_HELP = 'Prints the time spent in git and in every phase to' + \
+    ' stderr.'
+
+
+COMMANDS = [
+    Command(None, PROGRAM_HELP, [
+        FlagOption('commits', 'c', COMMITS_OPTION_HELP),
+        FlagOption('bounded', 'b', BOUNDED_OPTION_HELP),
+        FlagOption('json', 'J', JSON_OPTION_HELP),
+        FlagOption('watch', 'W', WATCH_OPTION_HELP),
+        FlagOption('tracked', 'T', TRACKED_OPTION_HELP),
+        FlagOption('trace', 't', TRACE_OPTION_HELP),
+        Option(
+            'workspace', 'C', WORKSPACE_OPTION_HELP, is_multiple=True)
+    ]),
+    Command('pull', PULL_COMMAND_HELP, [
+        FlagOption('wipe', 'w', WIPE_OPTION_HELP),
+        FlagOption('replay', 'r', REPLAY_OPTION_HELP),
+        Option('jobs', 'j', JOBS_OPTION_HELP, type=int)
+    ]),
+    Command('wipe', WIPE_COMMAND_HELP),
+    Command('daemon', DAEMON_COMMAND_HELP, [
+        FlagOption('stop', 's', STOP_OPTION_HELP)
+    ])
+]
@@ -1,4 +1,7 @@
 class Commit:
+
+    __slots__ = ('_id', '_message')
+
     def __init__(self, id, message):
         self._id = id
         self._message = message
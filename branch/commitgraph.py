@@ -0,0 +1,226 @@
+import heapq
+import mmap
+import os
+import struct
+
+
+SIGNATURE = b'CGPH'
+HASH_LENGTHS = {1: 20, 2: 32}
+CHUNK_FANOUT = b'OIDF'
+CHUNK_LOOKUP = b'OIDL'
+CHUNK_DATA = b'CDAT'
+CHUNK_EDGES = b'EDGE'
+NO_PARENT = 0x70000000
+EDGE_FLAG = 0x80000000
+EDGE_MASK = 0x7fffffff
+CHAIN_PATH = os.path.join('info', 'commit-graphs', 'commit-graph-chain')
+GRAPH_PATH = os.path.join('info', 'commit-graph')
+
+
+class CommitGraphLayer:
+
+    def __init__(self, path, offset):
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offset = offset
+        try:
+            self._read_header()
+        except (struct.error, ValueError):
+            self.close()
+            raise
+
+    def _read_header(self):
+        signature, version, hash_version, chunk_count, _ = \
+            struct.unpack_from('>4sBBBB', self._map, 0)
+        if signature != SIGNATURE or version != 1 \
+                or hash_version not in HASH_LENGTHS:
+            raise ValueError('Unsupported commit-graph file')
+
+        self._hash_length = HASH_LENGTHS[hash_version]
+        chunks = {}
+        for i in range(chunk_count):
+            id, offset = struct.unpack_from('>4sQ', self._map, 8 + 12 * i)
+            chunks[id] = offset
+
+        for id in (CHUNK_FANOUT, CHUNK_LOOKUP, CHUNK_DATA):
+            if id not in chunks:
+                raise ValueError('Missing commit-graph chunk')
+
+        self._fanout = chunks[CHUNK_FANOUT]
+        self._lookup = chunks[CHUNK_LOOKUP]
+        self._data = chunks[CHUNK_DATA]
+        self._edges = chunks.get(CHUNK_EDGES)
+        self._count = \
+            struct.unpack_from('>I', self._map, self._fanout + 1020)[0]
+
+    @property
+    def offset(self):
+        return self._offset
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def hash_length(self):
+        return self._hash_length
+
+    def close(self):
+        self._map.close()
+
+    def find(self, oid):
+        first = oid[0]
+        fanout = self._fanout + 4 * first
+        low = 0 if first == 0 else \
+            struct.unpack_from('>I', self._map, fanout - 4)[0]
+        high = struct.unpack_from('>I', self._map, fanout)[0]
+        while low < high:
+            middle = (low + high) // 2
+            start = self._lookup + middle * self._hash_length
+            current = self._map[start:start + self._hash_length]
+            if current == oid:
+                return self._offset + middle
+            if current < oid:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def oid(self, position):
+        start = self._lookup + (position - self._offset) * self._hash_length
+        return self._map[start:start + self._hash_length]
+
+    def parents(self, position):
+        start = self._record(position) + self._hash_length
+        first, second = struct.unpack_from('>II', self._map, start)
+        if first == NO_PARENT:
+            return []
+        if second == NO_PARENT:
+            return [first]
+        if not second & EDGE_FLAG:
+            return [first, second]
+
+        parents = [first]
+        edge = self._edges + 4 * (second & EDGE_MASK)
+        while True:
+            parent = struct.unpack_from('>I', self._map, edge)[0]
+            parents.append(parent & EDGE_MASK)
+            if parent & EDGE_FLAG:
+                return parents
+            edge += 4
+
+    def time(self, position):
+        start = self._record(position) + self._hash_length + 8
+        high, low = struct.unpack_from('>II', self._map, start)
+        return ((high & 0x3) << 32) | low
+
+    def _record(self, position):
+        size = self._hash_length + 16
+        return self._data + (position - self._offset) * size
+
+
+class CommitGraph:
+
+    def open(objects):
+        paths = CommitGraph._find_layers(objects)
+        if len(paths) == 0:
+            return None
+
+        layers = []
+        try:
+            for path in paths:
+                offset = layers[-1].offset + layers[-1].count if layers else 0
+                layers.append(CommitGraphLayer(path, offset))
+        except (OSError, ValueError, struct.error):
+            for layer in layers:
+                layer.close()
+            return None
+        return CommitGraph(layers)
+
+    def _find_layers(objects):
+        chain = os.path.join(objects, CHAIN_PATH)
+        if os.path.isfile(chain):
+            with open(chain, 'r') as file:
+                hashes = [line.strip() for line in file if line.strip()]
+            directory = os.path.dirname(chain)
+            return [
+                os.path.join(directory, 'graph-{}.graph'.format(hash))
+                for hash
+                in hashes
+            ]
+
+        path = os.path.join(objects, GRAPH_PATH)
+        return [path] if os.path.isfile(path) else []
+
+    def __init__(self, layers):
+        self._layers = layers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        for layer in self._layers:
+            layer.close()
+        self._layers = []
+
+    def find(self, commit):
+        try:
+            oid = bytes.fromhex(commit)
+        except ValueError:
+            return None
+
+        for layer in reversed(self._layers):
+            if len(oid) != layer.hash_length:
+                return None
+            position = layer.find(oid)
+            if position is not None:
+                return position
+        return None
+
+    def oid(self, position):
+        return self.raw_oid(position).hex()
+
+    def raw_oid(self, position):
+        return self._layer(position).oid(position)
+
+    def parents(self, position):
+        return self._layer(position).parents(position)
+
+    def time(self, position):
+        return self._layer(position).time(position)
+
+    def _layer(self, position):
+        for layer in reversed(self._layers):
+            if position >= layer.offset:
+                return layer
+        raise IndexError('Commit position out of range: {}'.format(position))
+
+
+class CommitGraphWalk:
+
+    def __init__(self, graph, tips):
+        self._graph = graph
+        self._tips = tips
+
+    def __iter__(self):
+        graph, queue, seen, counter = self._graph, [], set(), 0
+        for tip in self._tips:
+            if tip not in seen:
+                seen.add(tip)
+                counter += 1
+                heapq.heappush(queue, (-graph.time(tip), counter, tip))
+
+        # Same order as a plain `git log`: newest commit date first.
+        while len(queue) > 0:
+            _, _, position = heapq.heappop(queue)
+            parents = graph.parents(position)
+            for parent in parents:
+                if parent not in seen:
+                    seen.add(parent)
+                    counter += 1
+                    heapq.heappush(
+                        queue, (-graph.time(parent), counter, parent))
+            yield position, parents
@@ -0,0 +1,46 @@
+from .commands import COMMANDS
+from .refs import RefStore
+
+
+HELP_FLAGS = ['-h', '--help']
+
+
+class Completion:
+
+    def __init__(self, commands=COMMANDS, path=None):
+        self._commands = {command.name: command for command in commands}
+        self._path = path
+
+    def complete(self, words):
+        # The last word is the one being completed, possibly empty.
+        word = words[-1] if len(words) > 0 else ''
+        command = None
+        for previous in words[:-1]:
+            if previous in self._commands:
+                command = previous
+                break
+
+        candidates = []
+        if word.startswith('-'):
+            candidates = self._flags(command)
+        elif command is None:
+            candidates = [name for name in self._commands if name is not None]
+        elif self._commands[command].takes_branch:
+            candidates = self._branches()
+        return sorted(
+            candidate
+            for candidate
+            in candidates
+            if candidate.startswith(word)
+        )
+
+    def _flags(self, command):
+        # Options of the root command have to precede any sub-command.
+        flags = list(HELP_FLAGS)
+        for option in self._commands[command].options:
+            flags.extend(['-' + option.letter, '--' + option.name])
+        return flags
+
+    def _branches(self):
+        store = RefStore.open(self._path)
+        return store.branch_names() if store is not None else []
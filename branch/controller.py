@@ -1,12 +1,14 @@
-import argparse
+import sys
 
 
 class Option:
-    def __init__(self, name, letter, help):
+    def __init__(self, name, letter, help, type=None, is_multiple=False):
         self._name = name
         self._letter = letter
         self._has_value = True
         self._help = help
+        self._type = type
+        self._is_multiple = is_multiple
 
     @property
     def help(self):
@@ -24,6 +26,14 @@ class Option:
     def has_value(self):
         return self._has_value
 
+    @property
+    def type(self):
+        return self._type
+
+    @property
+    def is_multiple(self):
+        return self._is_multiple
+
 
 class FlagOption(Option):
     def __init__(self, name, letter, help):
@@ -32,10 +42,11 @@ class FlagOption(Option):
 
 
 class Command:
-    def __init__(self, name, help, options=[]):
+    def __init__(self, name, help, options=[], takes_branch=False):
         self._name = name
         self._help = help
         self._options = options
+        self._takes_branch = takes_branch
 
     @property
     def help(self):
@@ -49,24 +60,66 @@ class Command:
     def options(self):
         return self._options
 
+    @property
+    def takes_branch(self):
+        return self._takes_branch
+
 
 class Controller:
-    def select(self, commands):
+    def select(self, commands, arguments=None):
+        arguments = sys.argv[1:] if arguments is None else arguments
         commands = {command.name: command for command in commands}
+        selection = self._select_flags(commands, arguments)
+        if selection is not None:
+            return selection
+
+        # Help, sub-commands and mistakes are left to argparse, which is
+        # only imported when it is needed.
         parser = self._create_root_parser(commands)
         subparsers = parser.add_subparsers(dest='__command__')
         for command in commands.values():
             self._add_command_parser(subparsers, command)
-        args = vars(parser.parse_args())
+        args = vars(parser.parse_args(arguments))
 
         command = commands[args['__command__']]
-        return command.name, {
+        options = list(command.options)
+        if command.name is not None and None in commands:
+            options.extend(commands[None].options)
+        selection = {
             option.name: args.get(option.name)
             for option
-            in command.options
+            in options
+        }
+        if command.takes_branch:
+            selection['branch'] = args['branch']
+        return command.name, selection
+
+    def _select_flags(self, commands, arguments):
+        root_command = commands.get(None)
+        if root_command is None:
+            return None
+
+        flags = {}
+        for option in root_command.options:
+            if not option.has_value:
+                flags['-' + option.letter] = option.name
+                flags['--' + option.name] = option.name
+
+        selected = set()
+        for argument in arguments:
+            if argument not in flags:
+                return None
+            selected.add(flags[argument])
+        return None, {
+            option.name: option.name in selected if not option.has_value
+            else None
+            for option
+            in root_command.options
         }
 
     def _create_root_parser(self, commands):
+        import argparse
+
         root_command = commands.get(None)
         args = {
             'allow_abbrev': False,
@@ -87,14 +140,27 @@ class Controller:
         subparser = subparsers.add_parser(command.name, help=command.help)
         for option in command.options:
             self._add_option_parser(subparser, option)
+        if command.takes_branch:
+            subparser.add_argument('branch')
 
     def _add_option_parser(self, parser, option):
         flags = ['-' + option.letter, '--' + option.name]
         args = {
             'help': option.help,
             'action': {
-                True: 'store_const',
+                True: 'append' if option.is_multiple else 'store',
                 False: 'store_true'
             }[option.has_value]
         }
+        if option.type is not None:
+            args['type'] = option.type
         parser.add_argument(*flags, **args)
+
+
+class FixedController:
+    def __init__(self, command=None, options={}):
+        self._command = command
+        self._options = options
+
+    def select(self, commands, arguments=None):
+        return self._command, dict(self._options)
@@ -0,0 +1,118 @@
+import json
+import os
+import socket
+import threading
+
+from .client import Client
+from .display import Message
+from .live import LiveTree
+from .renderer import TreeJsonRenderer
+from .renderer import TreeRenderer
+from .watcher import Watcher
+
+
+BACKLOG = 16
+WATCH_TIMEOUT = 1.0
+
+
+class Daemon:
+
+    def __init__(self, git, display):
+        self._git = git
+        self._display = display
+        self._trees = {}
+        self._lock = threading.Lock()
+        self._is_running = False
+
+    def serve(self):
+        path = Client.socket_path(self._git.git_dir())
+        if Client(path).is_running():
+            self._display.message(
+                'A daemon is already serving {}.', path, type=Message.error)
+            return
+
+        server = self._listen(path)
+        watcher = Watcher.open(self._git.git_dir(), self._git.common_dir())
+        self._tree(False)
+        self._is_running = True
+        thread = threading.Thread(
+            target=self._watch, args=(watcher,), daemon=True)
+        thread.start()
+
+        self._display.message('Serving trees on {} ...', path)
+        try:
+            while self._is_running:
+                connection, _ = server.accept()
+                with connection:
+                    self._answer(connection)
+        finally:
+            self._is_running = False
+            server.close()
+            os.unlink(path)
+            thread.join()
+
+    def stop(self):
+        path = Client.socket_path(self._git.git_dir())
+        if Client(path).request({'command': 'stop'}) is None:
+            self._display.message(
+                'No daemon is serving {}.', path, type=Message.warning)
+            return
+        self._display.message('Stopped the daemon on {}.', path)
+
+    def _listen(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            os.unlink(path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(path)
+        server.listen(BACKLOG)
+        return server
+
+    def _watch(self, watcher):
+        with watcher:
+            while self._is_running:
+                changes = watcher.wait(WATCH_TIMEOUT)
+                if len(changes) == 0:
+                    continue
+                with self._lock:
+                    for tree in self._trees.values():
+                        tree.refresh(changes)
+
+    def _tree(self, include_commits):
+        with self._lock:
+            tree = self._trees.get(include_commits)
+            if tree is None:
+                tree = LiveTree(self._git, include_commits)
+                self._trees[include_commits] = tree
+            return tree.tree
+
+    def _answer(self, connection):
+        try:
+            request = json.loads(Daemon._receive(connection).decode('utf-8'))
+            response = self._respond(request)
+        except Exception as error:
+            response = {'error': str(error)}
+        connection.sendall(json.dumps(response).encode('utf-8'))
+
+    def _respond(self, request):
+        command = request.get('command')
+        if command == 'ping':
+            return {'lines': []}
+        if command == 'stop':
+            self._is_running = False
+            return {'lines': []}
+
+        tree = self._tree(bool(request.get('commits', False)))
+        renderer = TreeJsonRenderer() if command == 'json' \
+            else TreeRenderer()
+        with self._lock:
+            return {'lines': list(renderer.render_tree(tree))}
+
+    def _receive(connection):
+        chunks = []
+        while True:
+            chunk = connection.recv(1 << 16)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b''.join(chunks)
@@ -1,3 +1,5 @@
+import sys
+
 from enum import Enum
 
 
@@ -7,6 +9,9 @@ class Message(Enum):
     error = 'error'
 
 
+CLEAR_SCREEN = '\x1b[H\x1b[2J'
+
+
 class Display:
     MESSAGE_PREFIXES = {
         Message.info: 'INFO',
@@ -19,5 +24,15 @@ class Display:
         print('[ {0} ] {1}'.format(prefix, parts[0].format(*parts[1:])))
 
     def render(self, rendering):
-        print('\n'.join(rendering))
-        print('\n')
+        # Lines are written as soon as they are rendered.
+        output = sys.stdout
+        for line in rendering:
+            output.write(line)
+            output.write('\n')
+        output.write('\n\n')
+        output.flush()
+
+    def redraw(self, rendering):
+        if sys.stdout.isatty():
+            sys.stdout.write(CLEAR_SCREEN)
+        self.render(rendering)
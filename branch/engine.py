@@ -1,19 +1,9 @@
-import argparse
-
-from .controller import Command
-from .controller import FlagOption
-from .controller import Option
+from .commands import COMMANDS
 from .display import Message
+from .plan import RebasePlan
+from .renderer import TreeJsonRenderer
 from .renderer import TreeRenderer
-
-
-PROGRAM_HELP = 'Used to view and manage local git branches.'
-PULL_COMMAND_HELP = 'Pulls all remote branches and rebases local ones over' + \
-    ' their respective parrents.'
-WIPE_COMMAND_HELP = 'Deletes all local alias branches.'
-
-COMMITS_OPTION_HELP = 'Displays commits in the branch tree.'
-WIPE_OPTION_HELP = 'Invokes the wipe command after the pull finishes.'
+from . import trace
 
 
 class Engine:
@@ -21,75 +11,198 @@ class Engine:
         self._git = git
         self._display = display
         self._controller = controller
+        self._options = {}
 
     def run(self):
         try:
-            command, options = self._controller.select(self._build_commands())
-            tree = self._detect_tree(options.get('commits', False))
-            if command is None:
-                render_commits = options.get('commits', False)
-                self._display.render(TreeRenderer().render_tree(tree))
+            command, options = self._controller.select(COMMANDS)
+            self._options = options
+            if options.get('trace', False):
+                trace.start()
+            if options.get('workspace'):
+                from .workspace import Workspace
+                with trace.span('workspace', 'command'):
+                    Workspace(self._display, options['workspace']).run(
+                        command, options)
                 return
 
-            if command == 'pull':
-                self._display.render(TreeRenderer().render_tree(tree))
-                self._pull_remotes(tree)
-                if options.get('wipe', False):
-                    tree = self._detect_tree(options.get('commits', False))
-                    self._wipe(tree)
-                return
+            with trace.span(command or 'tree', 'command'):
+                self._run_command(command, options)
+
+        except(KeyboardInterrupt):
+            return
+
+    def _run_command(self, command, options):
+        if command == 'daemon':
+            # Commands besides the tree itself import their modules lazily,
+            # which keeps the startup of a plain call short.
+            from .daemon import Daemon
+            daemon = Daemon(self._git, self._display)
+            if options.get('stop', False):
+                daemon.stop()
+            else:
+                daemon.serve()
+            return
+
+        if command is None and options.get('watch', False):
+            self._watch(options.get('commits', False))
+            return
+
+        tree = self._detect_tree(options.get('commits', False))
+        if command is None:
+            self._render(tree)
+            return
 
-            if command == 'wipe':
+        if command == 'pull':
+            self._render(tree)
+            self._pull_remotes(tree)
+            if options.get('wipe', False):
+                tree = self._detect_tree(options.get('commits', False))
                 self._wipe(tree)
-                return
+            return
 
-        except(KeyboardInterrupt):
+        if command == 'wipe':
+            self._wipe(tree)
             return
 
+    def _render(self, tree):
+        with trace.span('render'):
+            self._display.render(self._renderer().render_tree(tree))
+
+    def _renderer(self):
+        if self._options.get('json', False):
+            return TreeJsonRenderer()
+        return TreeRenderer()
+
+    def _watch(self, include_commits):
+        from .live import LiveTree
+        from .watcher import REFS
+        from .watcher import STAGE
+        from .watcher import Watcher
+
+        live = LiveTree(
+            self._git, include_commits,
+            bool(self._options.get('bounded', False)),
+            not self._options.get('tracked', False))
+        lines = None
+        with Watcher.open(
+                self._git.git_dir(), self._git.common_dir()) as watcher:
+            changes = {REFS, STAGE}
+            while True:
+                # The screen is only redrawn when the output changes.
+                if live.refresh(changes):
+                    rendering = list(self._renderer().render_tree(live.tree))
+                    if rendering != lines:
+                        self._display.redraw(rendering)
+                        lines = rendering
+                changes = watcher.wait()
+
     def _detect_tree(self, include_commits):
-        return self._git.tree(include_commits)
+        return self._git.tree(
+            include_commits, bool(self._options.get('bounded', False)),
+            untracked=not self._options.get('tracked', False))
 
     def _pull_remotes(self, tree):
-        self._display.message('Checking out to {}', tree.root.id)
-        self._git.checkout(tree.root.id)
-
-        self._display.message('Pulling remote {} ...', tree.root.id)
-        self._git.pull()
-
-        self._rebase_children(tree.root)
+        if self._options.get('replay', False):
+            from .replay import InMemoryRebase
+            InMemoryRebase(self._git, self._display).run(tree.root)
+            return
 
-    def _rebase_children(self, root):
+        self._display.message('Fetching remote {} ...', tree.root.id)
+        self._git.fetch()
+        if not self._update_root(tree.root):
+            self._display.message('Checking out to {}', tree.root.id)
+            self._git.checkout(tree.root.id)
+
+            self._display.message('Pulling remote {} ...', tree.root.id)
+            self._git.pull()
+
+        plan = RebasePlan(self._git, tree.root)
+        if plan.skipped > 0:
+            self._display.message(
+                'Skipping {} branches already based on their parents.',
+                plan.skipped)
+
+        jobs = self._options.get('jobs')
+        if jobs is not None and jobs > 1:
+            from .rebase import ParallelRebase
+            ParallelRebase(
+                self._git, self._display, jobs, plan).run(tree.root)
+        else:
+            self._rebase_children(tree.root, plan)
+
+    def _update_root(self, root):
+        upstream = self._git.upstream(root.id) if root.id != '' else None
+        if upstream is None:
+            return False
+
+        old, new = self._git.rev_parse(root.id), self._git.rev_parse(upstream)
+        if old == new:
+            self._display.message("'{}' is up to date.", root.id)
+            return True
+
+        if not self._git.is_ancestor(old, new):
+            self._display.message(
+                "'{}' has diverged from its upstream, rebasing it ...",
+                root.id, type=Message.warning)
+            self._git.rebase(root.id, upstream)
+            return True
+
+        # Only a checked out root needs its working tree to move along.
+        self._display.message("Fast-forwarding '{}' ...", root.id)
+        if root.id == self._git.current_branch():
+            self._git.fast_forward(upstream)
+        else:
+            self._git.update_ref(
+                root.id, new, old, message='branch: fast-forward')
+        return True
+
+    def _rebase_children(self, root, plan):
         self._display.message("Rebasing any '{}' child branches...", root.id)
         for branch in root.children.values():
-            if branch.is_remote is False:
-                self._display.message(
-                    "  Rebasing '{0}' over '{1}' ...", branch.id, root.id)
-                self._git.rebase(branch.id, root.id)
-            self._rebase_children(branch)
+            if branch.is_remote is False and plan.is_stale(branch):
+                branch = self._rebase_stack(branch, root, plan)
+            self._rebase_children(branch, plan)
+
+    def _rebase_stack(self, branch, root, plan):
+        # Every commit of a stack is replayed once, moving all of its
+        # branches together.
+        if not self._git.has_update_refs():
+            self._display.message(
+                "  Rebasing '{0}' over '{1}' ...", branch.id, root.id)
+            self._git.rebase(branch.id, root.id)
+            return branch
+
+        stack = plan.stack(branch, self._git.current_branch())
+        self._display.message(
+            "  Rebasing '{0}' over '{1}' ...",
+            "', '".join(branch.id for branch in stack), root.id)
+        self._git.rebase(stack[-1].id, root.id, update_refs=len(stack) > 1)
+        return stack[-1]
 
     def _wipe(self, tree):
         self._display.message('Collecting alias branches ...')
-        head = tree.head
+        active = self._git.current_branch()
 
+        deleted, kept = [], []
         for branch in tree.branches:
             aliases = branch.aliases
-            if len(aliases) is 0:
+            if len(aliases) == 0:
                 continue
 
-            self._display.message('Deleting: {} ...', ', '.join(aliases))
-            self._git.checkout(branch.id)
-            self._git.delete_branches(aliases)
-
+            # The checked out branch is kept, so HEAD never has to move.
+            names = aliases | {branch.id}
+            keep = active if active in names else branch.id
+            kept.append(keep)
+            deleted.extend(sorted(names - {keep}))
+
+        unmerged = self._git.unmerged_branches(deleted, kept)
+        for name in unmerged:
+            self._display.message(
+                "Skipping '{}', it is not merged.", name, type=Message.warning)
+        deleted = [name for name in deleted if name not in unmerged]
+
+        if len(deleted) > 0:
+            self._display.message('Deleting: {} ...', ', '.join(deleted))
+            self._git.delete_branches(deleted)
         self._display.message('Success.')
-        self._git.checkout(head.id)
-
-    def _build_commands(self):
-        return [
-            Command(None, PROGRAM_HELP, [
-                FlagOption('commits', 'c', COMMITS_OPTION_HELP)
-            ]),
-            Command('pull', PULL_COMMAND_HELP, [
-                FlagOption('wipe', 'w', WIPE_OPTION_HELP)
-            ]),
-            Command('wipe', WIPE_COMMAND_HELP)
-        ]
@@ -1,18 +1,40 @@
-import sys
-import re
-import uuid
-
+import os
+import queue
+import threading
+
+from codecs import latin_1_decode
+from collections import deque
+from subprocess import CalledProcessError
+from subprocess import DEVNULL
 from subprocess import PIPE
 from subprocess import Popen
 from subprocess import run
 
 from .branch import Branch
 from .branch import Stage
+from .cache import GraphCache
+from .commitgraph import CommitGraph
+from .commitgraph import CommitGraphWalk
 from .commit import Commit
+from .graph import GraphStore
+from .reachability import ReachabilityIndex
+from .refs import RefStore
 from .tree import Tree
+from . import trace
 
 
-ENCODING = sys.stdout.encoding
+# Git writes commit messages and ref names as UTF-8 unless configured
+# otherwise, no matter where its output goes.
+ENCODING = 'utf-8'
+LOG_FORMAT = '--pretty=tformat:%H%x00%P%x00%D'
+LOG_FIELDS = 3
+NO_BRANCHES = frozenset()
+SUBJECT_FORMAT = '--pretty=tformat:%H%x00%s'
+CHUNK_SIZE = 1 << 18
+QUEUE_SIZE = 16
+CACHE_PATH = os.path.join('branch', 'graph.json')
+REF_NAMESPACES = ['refs/heads/', 'refs/remotes/']
+UPDATE_REFS_VERSION = (2, 38)
 
 
 class GitException(Exception):
@@ -20,30 +42,156 @@ class GitException(Exception):
 
 
 class GitInteractor:
-    def __init__(self, adapter, command):
+    def __init__(self, adapter, command, input=None, cwd=None, width=1):
         self._adapter = adapter
         self._command = command
+        self._input = input
+        self._cwd = cwd
+        self._width = width
 
     def __enter__(self):
-        self._process = Popen(self._command, stdout=PIPE)
+        self._span = trace.span(
+            'git', 'subprocess', argv=list(self._command)).begin()
+        if self._input is None:
+            self._process = Popen(self._command, stdout=PIPE, cwd=self._cwd)
+        else:
+            self._process = Popen(
+                self._command, stdin=PIPE, stdout=PIPE, cwd=self._cwd)
+            self._process.stdin.write(
+                ''.join(line + '\n' for line in self._input).encode('ascii'))
+            self._process.stdin.close()
+
+        # Batches are parsed ahead on a separate thread, so git never waits
+        # on a full pipe while the consumer works.
+        self._batches = queue.Queue(QUEUE_SIZE)
+        self._batch = iter(())
+        self._is_done = False
+        self._is_cancelled = threading.Event()
+        self._producer = threading.Thread(target=self._produce, daemon=True)
+        self._producer.start()
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        self._process.terminate()
+        self._is_cancelled.set()
+        if self._process.poll() is None:
+            self._process.kill()
+        while self._producer.is_alive():
+            self._discard_batches()
+            self._producer.join(0.01)
+        self._process.stdout.close()
+        self._process.wait()
+        self._span.end()
 
     def __iter__(self):
         return self
 
     def __next__(self):
-        line = self._process.stdout.readline().decode(ENCODING).strip()
-        if line == '':
+        for record in self._batch:
+            return record
+        if self._is_done:
+            raise StopIteration()
+
+        batch = self._batches.get()
+        if batch is None:
+            self._is_done = True
             raise StopIteration()
+        if isinstance(batch, Exception):
+            self._is_done = True
+            raise batch
+
+        self._batch = iter(batch)
+        return next(self._batch)
+
+    def _produce(self):
+        try:
+            for batch in self._read():
+                if self._is_cancelled.is_set():
+                    break
+                if len(batch) > 0:
+                    self._span.add('records', len(batch))
+                    self._batches.put(batch)
+        except Exception as error:
+            self._batches.put(error)
+            return
+
+        if self._is_cancelled.is_set():
+            # Whatever git wrote before it was killed is read and dropped.
+            while self._process.stdout.read1(CHUNK_SIZE):
+                pass
+            return
+        self._batches.put(None)
+
+    def _discard_batches(self):
+        try:
+            while True:
+                self._batches.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _read(self):
+        # Records are NUL separated fields. Every chunk is decoded as
+        # latin-1, which never fails and keeps the raw bytes, so it can be
+        # split in one go. Adapters decode the text fields they need.
+        buffer = bytearray(CHUNK_SIZE)
+        view = memoryview(buffer)
+        stdout = self._process.stdout
+        width, remainder = self._width, ''
+        while True:
+            size = stdout.readinto1(buffer)
+            if size == 0:
+                break
+            self._span.add('bytes', size)
+
+            fields = (remainder + latin_1_decode(view[:size])[0]).split('\0')
+            remainder = fields.pop()
+            complete = len(fields) - len(fields) % width
+            yield list(map(self._adapter, *(
+                fields[column:complete:width] for column in range(width))))
+            if complete < len(fields):
+                remainder = '\0'.join(fields[complete:] + [remainder])
+
+
+class Task:
 
-        return self._adapter(line)
+    def __init__(self, function, *args):
+        # A bare thread is enough here, the executors of concurrent.futures
+        # take longer to import than most of these tasks take to run.
+        self._result = None
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._run, args=(function, args), daemon=True)
+        self._thread.start()
+
+    def result(self):
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def _run(self, function, args):
+        try:
+            self._result = function(*args)
+        except BaseException as error:
+            self._error = error
 
 
 class Git:
+    def __init__(self, path=None):
+        self._path = path
+        self._directories = None
+        self._store = None
+        self._is_store_open = False
+        self._has_merge_base_option = None
+        self._has_update_refs_option = None
+
     def branch(self):
+        store = self._ref_store()
+        if store is not None:
+            name = store.head_ref()
+            if name is None:
+                return '(HEAD detached at {})'.format(store.head()[:7])
+            return self._short_ref_name(name)
+
         branches = [
             branch.replace('*', '').strip()
             for branch
@@ -54,27 +202,186 @@ class Git:
             return 'master'
         return branches[0]
 
+    def current_branch(self):
+        store = self._ref_store()
+        if store is not None:
+            name = store.head_ref()
+            return self._short_ref_name(name) if name is not None else None
+
+        try:
+            return self._call(
+                'git', 'symbolic-ref', '--quiet', '--short', 'HEAD').strip()
+        except CalledProcessError:
+            return None
+
     def pull(self):
+        self._reset_refs()
         self._call('git', 'pull', '--rebase')
 
     def checkout(self, branch):
+        self._reset_refs()
         self._call('git', 'checkout', branch)
 
-    def rebase(self, branch, over):
-        self._call('git', 'rebase', over, branch)
+    def rebase(self, branch, over, quiet=False, update_refs=False):
+        self._reset_refs()
+        options = ['--quiet'] if quiet else []
+        if update_refs:
+            options.append('--update-refs')
+        self._call('git', 'rebase', *options, over, branch)
+
+    def has_update_refs(self):
+        if self._has_update_refs_option is None:
+            version = self._call('git', 'version').split()[2]
+            numbers = tuple(
+                int(part) for part in version.split('.')[:2] if part.isdigit())
+            self._has_update_refs_option = numbers >= UPDATE_REFS_VERSION
+        return self._has_update_refs_option
+
+    def abort_rebase(self):
+        self._reset_refs()
+        self._call('git', 'rebase', '--abort')
+
+    def detach(self):
+        self._reset_refs()
+        self._call('git', 'checkout', '--quiet', '--detach')
+
+    def add_worktree(self, path):
+        self._call('git', 'worktree', 'add', '--quiet', '--detach', path)
+
+    def remove_worktree(self, path):
+        self._call('git', 'worktree', 'remove', '--force', path)
 
     def cherry_pick(self, branch):
         pass
 
+    def fetch(self):
+        self._reset_refs()
+        self._call('git', 'fetch', '--quiet')
+
+    def upstream(self, branch):
+        upstream = self._call(
+            'git', 'for-each-ref', '--format=%(upstream)',
+            'refs/heads/' + branch).strip()
+        return upstream if upstream != '' else None
+
+    def is_ancestor(self, ancestor, descendant):
+        command = ['git', 'merge-base', '--is-ancestor', ancestor, descendant]
+        with trace.span('git', 'subprocess', argv=command):
+            process = run(command, cwd=self._path)
+        if process.returncode not in (0, 1):
+            raise CalledProcessError(process.returncode, command)
+        return process.returncode == 0
+
+    def fast_forward(self, upstream):
+        self._reset_refs()
+        self._call('git', 'merge', '--quiet', '--ff-only', upstream)
+
+    def rev_parse(self, revision):
+        return self._call('git', 'rev-parse', '--verify', revision).strip()
+
+    def replayed_commits(self, branch, over):
+        return self._call(
+            'git', 'rev-list', '--reverse', '--topo-order', '--no-merges',
+            '--right-only', '--cherry-pick', over + '...' + branch).split()
+
+    def read_commit(self, commit):
+        return self._call('git', 'cat-file', 'commit', commit)
+
+    def merge_tree(self, base, ours, theirs):
+        if self._has_merge_base_option is not False:
+            process = run(
+                ['git', 'merge-tree', '--write-tree',
+                 '--merge-base=' + base, ours, theirs],
+                stdout=PIPE, stderr=PIPE, cwd=self._path)
+            if process.returncode in (0, 1):
+                self._has_merge_base_option = True
+                tree = process.stdout.decode('ascii').split('\n', 1)[0]
+                return tree, process.returncode == 0
+            if self._has_merge_base_option:
+                process.check_returncode()
+            self._has_merge_base_option = False
+
+        # Before --merge-base, merge-tree always merges at the merge base of
+        # its arguments, so both sides get a throwaway parent pinned to base.
+        ours = self.commit_tree(ours + '^{tree}', base, 'ours')
+        theirs = self.commit_tree(theirs + '^{tree}', base, 'theirs')
+        process = run(
+            ['git', 'merge-tree', '--write-tree', ours, theirs],
+            stdout=PIPE, stderr=PIPE, cwd=self._path)
+        if process.returncode not in (0, 1):
+            process.check_returncode()
+        tree = process.stdout.decode('ascii').split('\n', 1)[0]
+        return tree, process.returncode == 0
+
+    def commit_tree(self, tree, parent, message, author=None):
+        environment = None
+        if author is not None:
+            environment = {
+                'GIT_AUTHOR_NAME': author[0],
+                'GIT_AUTHOR_EMAIL': author[1],
+                'GIT_AUTHOR_DATE': author[2]
+            }
+        return self._call(
+            'git', 'commit-tree', tree, '-p', parent, '-F', '-',
+            input=message, environment=environment).strip()
+
+    def update_ref(self, branch, new, old, message='branch: replay'):
+        self._reset_refs()
+        self._call(
+            'git', 'update-ref', '-m', message,
+            'refs/heads/' + branch, new, old)
+
+    def reset_keep(self, commit):
+        self._reset_refs()
+        self._call('git', 'reset', '--quiet', '--keep', commit)
+
+    def refresh(self):
+        self._reset_refs()
+
+    def stage(self, untracked=True):
+        return self._build_stage(untracked)
+
+    def git_dir(self):
+        return self._git_dir()
+
+    def commit_cache(self):
+        return CommitCache(CommitReader(self._path))
+
+    def common_dir(self):
+        return self._common_dir()
+
+    def ref_tips(self):
+        store = self._ref_store()
+        if store is not None:
+            tips = store.refs(*REF_NAMESPACES)
+            tips['HEAD'] = '{} {}'.format(store.head_ref(), store.head())
+            return tips
+
+        tips = {}
+        for line in self._call(
+                'git', 'for-each-ref', '--format=%(refname) %(objectname)',
+                *REF_NAMESPACES).split('\n'):
+            if line != '':
+                name, commit = line.split(' ')
+                tips[name] = commit
+        tips['HEAD'] = self.branch()
+        return tips
+
     def remote_branches(self):
-        return self._call('git', 'branch', '--remote')
+        store = self._ref_store()
+        if store is not None:
+            return store.remote_branches()
+
+        return [
+            branch.strip()
+            for branch
+            in self._call('git', 'branch', '--remote').split('\n')
+            if branch.strip() != '' and ' -> ' not in branch
+        ]
 
     def show_branch(self):
         return self._call('git', 'show-branch', '--no-color', '--topo-order')
 
-    def status(self):
-        return self._call('git', 'status', '--porcelain').split('\n')
-
     def merged_branches(self):
         rows = self._call('git', 'branch', '--merged', 'master') \
             .strip().split('\n')
@@ -85,24 +392,237 @@ class Git:
             if row.find('master') < 0
         ]
 
-    def delete_branches(self, branches):
-        return self._call('git', 'branch', '--delete', *branches)
+    def unmerged_branches(self, branches, into):
+        if len(branches) == 0:
+            return []
+
+        tips = self._branch_tips()
+        revisions = [tips[branch] for branch in branches] + \
+            ['^' + tips[branch] for branch in into]
+        commits = set(self._call(
+            'git', 'rev-list', '--stdin',
+            input=''.join(revision + '\n' for revision in revisions)
+        ).split())
+        return [branch for branch in branches if tips[branch] in commits]
+
+    def tips(self):
+        return {
+            name: commit
+            for commit, names
+            in self._refs().items()
+            for name
+            in names
+        }
+
+    def branches_containing(self, commit):
+        return set(
+            line[len('refs/heads/'):]
+            for line
+            in self._call(
+                'git', 'for-each-ref', '--format=%(refname)',
+                '--contains', commit, 'refs/heads/'
+            ).split('\n')
+            if line != ''
+        )
 
-    def tree(self, include_commits):
-        reader = TreeReader(include_commits)
-        with self._log() as log:
-            data = reader.read(self._head(), self._branches(), log)
+    def delete_branches(self, branches):
+        tips = self._branch_tips()
+        commands = ''.join(
+            'delete refs/heads/{} {}\n'.format(branch, tips[branch])
+            for branch
+            in branches
+        )
+        self._reset_refs()
+        self._call(
+            'git', 'update-ref', '--stdin',
+            input='start\n' + commands + 'commit\n')
+        self._remove_branch_configs(branches)
+
+    def _remove_branch_configs(self, branches):
+        try:
+            keys = self._call(
+                'git', 'config', '--local', '--name-only', '--get-regexp',
+                '^branch\\.').split()
+        except CalledProcessError:
+            return
+
+        configured = set(
+            key[len('branch.'):key.rindex('.')]
+            for key
+            in keys
+        )
+        for branch in configured.intersection(branches):
+            self._call(
+                'git', 'config', '--local', '--remove-section',
+                'branch.' + branch)
+
+    def tree(self, include_commits, bounded=False, commits=None,
+             untracked=True):
+        self._ref_store()
+        # The working tree scan runs while the history is being read.
+        stage = Task(self._build_stage, untracked)
+        head = Task(self._head)
+        branches = Task(lambda: list(self._branches()))
+        head, branches = head.result(), branches.result()
+
+        reader = TreeReader(commits or CommitReader(self._path))
+        with self._select_log(head, branches, bounded) as log:
+            data = reader.read(head, branches, log)
         tree = TreeBuilder.build_tree(data, include_commits)
-        tree.head.stage = self._build_stage()
+        tree.head.stage = stage.result()
         return tree
 
-    def _log(self):
+    def _log(self, include=None, exclude=()):
+        if include is None:
+            return GitInteractor(
+                LogEntry.parse_fields,
+                ['git', 'log', '-z', '--all', LOG_FORMAT],
+                cwd=self._path,
+                width=LOG_FIELDS
+            )
+
         return GitInteractor(
-            lambda line: LogEntry.from_string(line),
-            ['git', 'log', '--all', '--pretty=format:[C:%H][P:%P][R:%D][M:%s]']
+            LogEntry.parse_fields,
+            ['git', 'log', '-z', '--ignore-missing', '--stdin', LOG_FORMAT],
+            list(include) + ['^' + commit for commit in exclude],
+            cwd=self._path,
+            width=LOG_FIELDS
         )
 
+    def _select_log(self, head, branches, bounded):
+        if bounded:
+            log = self._bounded_log(head, branches)
+            if log is not None:
+                return log
+
+        log = self._graph_log(head)
+        if log is not None:
+            return log
+
+        return self._cached_log(head)
+
+    def _bounded_log(self, head, branches):
+        tips = [head] + ['refs/heads/' + branch for branch in branches]
+        try:
+            root = self._call('git', 'merge-base', '--octopus', *tips).strip()
+        except CalledProcessError:
+            return None
+        return self._log(tips, [root + '^@'])
+
+    def _graph_log(self, head):
+        if self._has_rewritten_history():
+            return None
+
+        graph = CommitGraph.open(os.path.join(self._common_dir(), 'objects'))
+        if graph is None:
+            return None
+
+        refs = self._refs()
+        tips = [graph.find(commit) for commit in set(refs.keys()) | {head}]
+        if None in tips:
+            graph.close()
+            return None
+        return CommitGraphLog(graph, tips, refs)
+
+    def _has_rewritten_history(self):
+        common_dir = self._common_dir()
+        for path in ('shallow', os.path.join('info', 'grafts')):
+            if os.path.exists(os.path.join(common_dir, path)):
+                return True
+        return os.path.isdir(os.path.join(common_dir, 'refs', 'replace'))
+
+    def _cached_log(self, head):
+        refs = self._refs()
+        tips = set(refs.keys())
+        tips.add(head)
+        cache = GraphCache(self._cache_path()).load()
+        return CachedLog(cache, tips, refs, self._log)
+
+    def _cache_path(self):
+        return os.path.join(self._git_dir(), CACHE_PATH)
+
+    def _git_dir(self):
+        return self._find_directories()[0]
+
+    def _common_dir(self):
+        return self._find_directories()[1]
+
+    def _find_directories(self):
+        if self._directories is not None:
+            return self._directories
+
+        store = self._ref_store()
+        if store is not None:
+            self._directories = [store.git_dir, store.common_dir]
+        else:
+            self._directories = [
+                os.path.join(self._path or os.getcwd(), directory)
+                for directory
+                in self._call(
+                    'git', 'rev-parse', '--git-dir', '--git-common-dir'
+                ).strip().split('\n')
+            ]
+        return self._directories
+
+    def _ref_store(self):
+        if not self._is_store_open:
+            self._store = RefStore.open(self._path)
+            self._is_store_open = True
+        return self._store
+
+    def _reset_refs(self):
+        if self._store is not None:
+            self._store.reload()
+
+    def _refs(self):
+        store = self._ref_store()
+        if store is not None:
+            refs = {}
+            for name, commit in store.refs(*REF_NAMESPACES).items():
+                refs.setdefault(commit, set()).add(self._short_ref_name(name))
+            return refs
+
+        output = self._call(
+            'git', 'for-each-ref', '--format=%(objectname) %(refname)',
+            *REF_NAMESPACES)
+        refs = {}
+        for row in output.split('\n'):
+            if row == '':
+                continue
+            commit, name = row.split(' ', 1)
+            refs.setdefault(commit, set()).add(self._short_ref_name(name))
+        return refs
+
+    def _short_ref_name(self, name):
+        for namespace in REF_NAMESPACES:
+            if name.startswith(namespace):
+                return name[len(namespace):]
+        return name
+
+    def _branch_tips(self):
+        store = self._ref_store()
+        if store is not None:
+            return {
+                name[len('refs/heads/'):]: commit
+                for name, commit
+                in store.refs('refs/heads/').items()
+            }
+
+        output = self._call(
+            'git', 'for-each-ref', '--format=%(objectname) %(refname:short)',
+            'refs/heads/')
+        return {
+            row.split(' ', 1)[1]: row.split(' ', 1)[0]
+            for row
+            in output.split('\n')
+            if row != ''
+        }
+
     def _branches(self):
+        store = self._ref_store()
+        if store is not None:
+            return store.branches()
+
         return (
             branch.replace('*', '').strip()
             for branch
@@ -111,28 +631,59 @@ class Git:
         )
 
     def _head(self):
+        store = self._ref_store()
+        if store is not None:
+            return store.head()
         return self._call('git', 'log', '-1', '--pretty=%H').strip()
 
-    def _build_stage(self):
-        output = self.status()
-        staged = False
-        unstaged = False
-        untracked = False
-        for row in output:
-            if row.strip() == '' or row.startswith('##'):
-                continue
-            if row.startswith('??'):
-                untracked = True
-                continue
-            if row[1] != ' ':
-                unstaged = True
-            if row[0] != ' ':
-                staged = True
-
-        return Stage(staged, unstaged, untracked)
+    def _build_stage(self, include_untracked=True):
+        # Each question stops at the first difference git finds, instead of
+        # listing every change like status does.
+        staged = Task(
+            self._has_changes, 'git', 'diff', '--cached', '--quiet')
+        unstaged = Task(self._has_changes, 'git', 'diff', '--quiet')
+        untracked = Task(self._has_untracked) if include_untracked else None
+        return Stage(
+            staged.result(),
+            unstaged.result(),
+            untracked.result() if untracked is not None else False
+        )
 
-    def _call(self, *command):
-        process = run(command, stdout=PIPE)
+    def _has_changes(self, *command):
+        with trace.span('git', 'subprocess', argv=list(command)):
+            process = run(command, stdout=DEVNULL, cwd=self._path)
+        if process.returncode not in (0, 1):
+            raise CalledProcessError(process.returncode, command)
+        return process.returncode == 1
+
+    def _has_untracked(self):
+        command = [
+            'git', 'ls-files', '--others', '--exclude-standard', '--directory',
+            '--no-empty-directory', '-z', '--', ':/'
+        ]
+        with trace.span('git', 'subprocess', argv=command):
+            process = Popen(command, stdout=PIPE, cwd=self._path)
+            try:
+                found = len(process.stdout.read(1)) > 0
+                if found:
+                    process.kill()
+            finally:
+                process.stdout.close()
+                process.wait()
+        if not found and process.returncode != 0:
+            raise CalledProcessError(process.returncode, command)
+        return found
+
+    def _call(self, *command, input=None, environment=None):
+        if input is not None:
+            input = input.encode('utf-8')
+        if environment is not None:
+            environment = dict(os.environ, **environment)
+        with trace.span('git', 'subprocess', argv=list(command)) as span:
+            process = run(
+                command, stdout=PIPE, cwd=self._path, input=input,
+                env=environment)
+            span.set('bytes', len(process.stdout))
         process.check_returncode()
         return process.stdout.decode(ENCODING)
 
@@ -142,7 +693,11 @@ class LogEntry:
     PATTERN = '\[C:(.*?)\]\[P:(.*?)\]\[R:(.*?)\]\[M:(.*)\]'
     HEAD_MARKER = 'HEAD -> '
 
+    __slots__ = ('_commit', '_parents', '_branches', '_message')
+
     def from_string(line):
+        import re
+
         matcher = re.match(LogEntry.PATTERN, line)
         if not matcher:
             raise Error('Unexpected log entry: {}'.format(line))
@@ -152,6 +707,21 @@ class LogEntry:
         message = matcher.group(4)
         return LogEntry(commit, parents, branches, message)
 
+    def from_fields(commit, parents, refs):
+        return LogEntry(*LogEntry.parse_fields(commit, parents, refs), '')
+
+    def parse_fields(commit, parents, refs):
+        # Log readers get plain (commit, parents, branches) records, most
+        # commits carry no refs and share one empty set.
+        if refs == '':
+            return commit, parents.split(' ') if parents != '' else [], \
+                NO_BRANCHES
+        branches = LogEntry._build_branches(LogEntry._decode(refs))
+        return commit, parents.split(' ') if parents != '' else [], branches
+
+    def _decode(field):
+        return field.encode('latin-1').decode(ENCODING, 'replace')
+
     def _build_parents(parents):
         return parents.split(' ') if parents != '' else []
 
@@ -185,15 +755,125 @@ class LogEntry:
         return Commit(self._commit, self._message)
 
 
+class CachedLog:
+
+    def __init__(self, cache, tips, refs, walk):
+        self._cache = cache
+        self._tips = tips
+        self._refs = refs
+        self._walk = walk
+        self._consumed = []
+        self._has_walked = False
+
+    def __enter__(self):
+        self._entries = self._read()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._entries.close()
+        # Nothing new was read from git, the cache already holds it all.
+        if exc_type is None and \
+                (self._has_walked or self._tips != self._cache.tips):
+            self._cache.save(self._tips, self._consumed)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        record = next(self._entries)
+        self._consumed.append(record[:2])
+        return record
+
+    def _read(self):
+        seen, pending = set(), set()
+
+        # Commits which are not reachable from the cached tips can only be
+        # descendants of cached ones, so they go first.
+        if self._tips != self._cache.tips:
+            with self._walk(self._tips, self._cache.tips) as log:
+                for record in log:
+                    self._has_walked = True
+                    seen.add(record[0])
+                    pending.update(record[1])
+                    yield record
+
+        reachable = self._reachable(pending.union(self._tips))
+        for commit, parents in self._cache.entries:
+            if commit not in reachable or commit in seen:
+                continue
+            seen.add(commit)
+            pending.update(parents)
+            yield commit, list(parents), self._refs.get(commit, NO_BRANCHES)
+
+        # The reader did not find its root in the cached history, so the
+        # walk continues below the oldest cached commits.
+        frontier = pending.difference(seen)
+        if len(frontier) == 0:
+            return
+
+        with self._walk(frontier) as log:
+            for record in log:
+                if record[0] not in seen:
+                    self._has_walked = True
+                    seen.add(record[0])
+                    yield record
+
+    def _reachable(self, commits):
+        graph = dict(self._cache.entries)
+        stack = [commit for commit in commits if commit in graph]
+        reachable = set(stack)
+        while len(stack) > 0:
+            for parent in graph[stack.pop()]:
+                if parent in graph and parent not in reachable:
+                    reachable.add(parent)
+                    stack.append(parent)
+        return reachable
+
+
+class CommitGraphLog:
+
+    def __init__(self, graph, tips, refs):
+        self._graph = graph
+        self._tips = tips
+        self._refs = {graph.find(commit): refs[commit] for commit in refs}
+
+    def __enter__(self):
+        self._entries = self._read()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._entries.close()
+        self._graph.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._entries)
+
+    def _read(self):
+        # Records carry the raw ids of the commit-graph, GraphStore keeps
+        # them as they are instead of going through hex.
+        graph = self._graph
+        for position, parents in CommitGraphWalk(graph, self._tips):
+            yield graph.raw_oid(position), \
+                [graph.raw_oid(parent) for parent in parents], \
+                self._refs.get(position, NO_BRANCHES)
+
+
 class TreeData:
 
-    def __init__(self, tree, branches, commits, head, root):
-        self._tree = tree
+    def __init__(self, graph, branches, commits, head, root):
+        self._graph = graph
         self._branches = branches
         self._commits = commits
         self._head = head
         self._root = root
 
+    @property
+    def graph(self):
+        return self._graph
+
     @property
     def branches(self):
         return self._branches
@@ -206,114 +886,179 @@ class TreeData:
     def root(self):
         return self._root
 
-    def commit(self, commit):
-        return self._commits.get(commit)
+    def commits(self, commits):
+        return self._commits.read(commits)
 
     def children(self, commit):
-        return self._tree.get(commit, [])
+        id = self._graph.id(commit)
+        if id is None:
+            return []
+        return [self._graph.key(child) for child in self._graph.children(id)]
 
 
 class TreeReader:
 
-    def __init__(self, _should_include_commits):
-        self._should_include_commits = _should_include_commits
+    def __init__(self, commits=None):
+        self._commits = commits
 
     def read(self, head, branches, log):
+        with trace.span('read') as span:
+            data, entries = self._read(head, branches, log)
+            span.set('entries', entries)
+        return data
+
+    def _read(self, head, branches, log):
         unvisited_branches = set(branches)
-        tree, refs, commits, root = {}, {}, {}, None
-        is_head_found = False
-        for entry in log:
-            if entry.commit == head:
+        graph, refs, root = GraphStore(), {}, None
+        index = ReachabilityIndex(graph)
+        is_head_found, entries = False, 0
+        for commit, parents, branches in log:
+            entries += 1
+            id = graph.add(commit, parents)
+            index.add(id)
+            if not is_head_found and graph.key(id) == head:
                 is_head_found = True
 
-            for parent in entry.parents:
-                tree[parent] = tree.get(parent, []) + [entry.commit]
-
-            if self._should_include_commits:
-                commits[entry.commit] = entry.to_commit()
-
-            branches = [
-                branch
-                for branch
-                in entry.branches
-                if branch in unvisited_branches
-            ]
-
             if len(branches) > 0:
-                unvisited_branches.difference_update(set(branches))
-                refs[entry.commit] = branches
+                branches = [
+                    branch
+                    for branch
+                    in branches
+                    if branch in unvisited_branches
+                ]
+                if len(branches) > 0:
+                    unvisited_branches.difference_update(set(branches))
+                    refs[graph.key(id)] = branches
+                    index.mark(id)
 
             if is_head_found \
-                    and len(unvisited_branches) is 0 \
-                    and self._is_root(entry.commit, refs, tree):
-                root = entry.commit
+                    and len(unvisited_branches) == 0 \
+                    and index.reaches_all(id):
+                root = graph.key(id)
                 break
-        return TreeData(tree, refs, commits, head, root)
+        return TreeData(graph, refs, self._commits, head, root), entries
 
-    def _is_root(self, commit, refs, tree):
-        return all(self._has_path(commit, ref, tree) for ref in refs)
 
-    def _has_path(self, commit, ref, tree):
-        if commit == ref:
-            return True
+class CommitReader:
+
+    def __init__(self, path=None):
+        self._path = path
+
+    def read(self, commits):
+        if len(commits) == 0:
+            return {}
+
+        # A single process reads every subject, in whatever order git likes.
+        result = {}
+        with GitInteractor(
+            CommitReader._to_commit,
+            ['git', 'log', '-z', '--no-walk=unsorted', '--stdin',
+             SUBJECT_FORMAT],
+            list(commits),
+            cwd=self._path,
+            width=2
+        ) as log:
+            for commit in log:
+                result[commit.id] = commit
+        return result
+
+    def _to_commit(commit, subject):
+        return Commit(commit, LogEntry._decode(subject))
+
+
+class CommitCache:
 
-        if commit not in tree:
-            return False
+    def __init__(self, reader):
+        self._reader = reader
+        self._commits = {}
 
-        return any(self._has_path(point, ref, tree) for point in tree[commit])
+    def read(self, commits):
+        missing = [commit for commit in commits if commit not in self._commits]
+        self._commits.update(self._reader.read(missing))
+
+        # Only the commits of the latest tree are kept around.
+        self._commits = {
+            commit: self._commits[commit]
+            for commit
+            in commits
+            if commit in self._commits
+        }
+        return dict(self._commits)
 
 
 class TreeBuilder:
 
     def build_tree(data, should_include_commits):
-        branches = TreeBuilder(
-            data, should_include_commits
-        )._build_branches(data.root, None, {})
+        branches = {}
+        with trace.span('build') as span:
+            if data.root is not None:
+                root = data.graph.intern(data.root)
+                branches = TreeBuilder(
+                    data, should_include_commits
+                )._build_branches(root)
+            span.set('branches', len(branches))
+        if should_include_commits:
+            with trace.span('commits'):
+                TreeBuilder._load_commits(data, branches.values())
         return Tree(data.head, data.root, branches)
 
+    def _load_commits(data, branches):
+        # Only the commits which ended up in a branch are ever read.
+        commits = data.commits(
+            [commit for branch in branches for commit in branch.commits])
+        for branch in branches:
+            branch.commits = [
+                commits.get(commit) or Commit(commit, '')
+                for commit
+                in branch.commits
+            ]
+
     def __init__(self, data, should_include_commits):
         self._data = data
+        self._graph = data.graph
+        self._head = data.graph.id(data.head)
         self._should_include_commits = should_include_commits
 
-    def _build_branches(self, root, parent, visited):
-        commits = []
-        for commit in self._walk_tree(root):
-            if self._should_include_commits:
-                commits.insert(0, self._data.commit(commit))
-
-            if not self._is_branch_point(commit):
-                continue
-
-            branch = self._get_branch(commit, commits, visited)
-            visited[commit] = branch
-            if parent is not None:
+    def _build_branches(self, root):
+        # Every commit is walked once. A walk ends at a branch point, or at
+        # a commit an earlier walk has already reached after a merge.
+        branches = {}
+        visited = bytearray(len(self._graph))
+        owners = [None] * len(self._graph)
+        stack = [(root, None)]
+        while len(stack) > 0:
+            id, parent = stack.pop()
+            chain, commits, branch = [], deque(), None
+            while id is not None:
+                if visited[id]:
+                    branch = owners[id]
+                    if branch is not None:
+                        branch.commits.extend(commits)
+                    break
+
+                chain.append(id)
+                commit = self._graph.key(id)
+                if self._should_include_commits:
+                    commits.appendleft(commit)
+
+                children = self._graph.children(id)
+                if self._is_branch_point(id, commit, children):
+                    branch = Branch(
+                        commit, self._data.branches.get(commit, []),
+                        list(commits))
+                    branches[commit] = branch
+                    stack.extend((child, branch) for child in children[::-1])
+                    break
+                id = children[0] if len(children) > 0 else None
+
+            for id in chain:
+                visited[id] = 1
+                owners[id] = branch
+            if branch is not None and parent is not None:
                 parent.children[branch.ref] = branch
+        return branches
 
-            branches = {commit: branch}
-            for child in self._data.children(commit):
-                branches.update(self._build_branches(child, branch, visited))
-
-            return branches
-        return {}
-
-    def _walk_tree(self, root):
-        commit = root
-        while commit is not None:
-            yield commit
-            children = self._data.children(commit)
-            commit = children[0] if len(children) > 0 else None
-
-    def _is_branch_point(self, commit):
-        if commit == self._data.head:
+    def _is_branch_point(self, id, commit, children):
+        if id == self._head:
             return True
-
-        children = self._data.children(commit)
         return commit in self._data.branches or len(children) > 1
-
-    def _get_branch(self, commit, commits, visited):
-        if commit not in visited:
-            return Branch(commit, self._data.branches.get(commit, []), commits)
-
-        branch = visited[commit]
-        branch.commits.extend(c for c in commits if c not in branch.commits)
-        return branch
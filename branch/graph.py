@@ -0,0 +1,176 @@
+from array import array
+
+
+OBJECT_ID_SIZE = 20
+MIN_SLOTS = 1 << 10
+
+
+class GraphStore:
+
+    __slots__ = (
+        '_size', '_slots', '_buffer', '_ids', '_names', '_last_key',
+        '_last_id', '_parent_starts',
+        '_parent_ends', '_edge_parents', '_edge_children', '_child_offsets',
+        '_children'
+    )
+
+    def __init__(self, size=OBJECT_ID_SIZE):
+        # Object ids, given as hex or raw bytes, are kept as raw bytes one
+        # after another in a single buffer, and found through an open
+        # addressing table of ids. Any other key, like an abbreviated id,
+        # is kept as it is.
+        self._size = size
+        self._slots = array('i', [-1]) * MIN_SLOTS
+        self._buffer = bytearray()
+        self._ids = {}
+        self._names = {}
+        self._last_key = None
+        self._last_id = None
+        self._parent_starts = array('I')
+        self._parent_ends = array('I')
+        self._edge_parents = array('i')
+        self._edge_children = array('i')
+        self._child_offsets = None
+        self._children = None
+
+    def __len__(self):
+        return len(self._parent_starts)
+
+    def __contains__(self, key):
+        return self.id(key) is not None
+
+    def intern(self, key):
+        # Logs mostly list a commit right after the child that named it as
+        # a parent, so the last key saves decoding and probing it again.
+        if key == self._last_key:
+            return self._last_id
+
+        encoded = self._encode(key)
+        if encoded is None:
+            return self._intern_name(GraphStore._name(key))
+
+        # The probing of _find, inlined as this runs for every commit read.
+        slots, buffer, size = self._slots, self._buffer, self._size
+        mask = len(slots) - 1
+        slot = hash(encoded) & mask
+        id = slots[slot]
+        while id >= 0:
+            if buffer.startswith(encoded, id * size):
+                self._last_key, self._last_id = key, id
+                return id
+            slot = (slot + 1) & mask
+            id = slots[slot]
+
+        id = self._append()
+        slots[slot] = id
+        buffer += encoded
+        if 2 * len(buffer) > size * len(slots):
+            self._resize()
+        self._last_key, self._last_id = key, id
+        return id
+
+    def id(self, key):
+        encoded = self._encode(key)
+        if encoded is None:
+            return self._ids.get(GraphStore._name(key))
+        id = self._slots[self._find(encoded)]
+        return id if id >= 0 else None
+
+    def key(self, id):
+        if id in self._names:
+            return self._names[id]
+        start = id * self._size
+        return self._buffer[start:start + self._size].hex()
+
+    def keys(self):
+        return [self.key(id) for id in range(len(self))]
+
+    def add(self, commit, parents):
+        id = self.intern(commit)
+        self._parent_starts[id] = len(self._edge_parents)
+        for parent in parents:
+            self._link(self.intern(parent), id)
+        self._parent_ends[id] = len(self._edge_parents)
+        return id
+
+    def link(self, parent, child):
+        self._link(self.intern(parent), self.intern(child))
+
+    def parents(self, id):
+        start, end = self._parent_starts[id], self._parent_ends[id]
+        return self._edge_parents[start:end]
+
+    def children(self, id):
+        if self._child_offsets is None:
+            self._index_children()
+        start, end = self._child_offsets[id], self._child_offsets[id + 1]
+        return self._children[start:end]
+
+    def _encode(self, key):
+        if isinstance(key, bytes):
+            return key if len(key) == self._size else None
+        if len(key) == 2 * self._size:
+            try:
+                return bytes.fromhex(key)
+            except ValueError:
+                pass
+        return None
+
+    def _name(key):
+        return key.hex() if isinstance(key, bytes) else key
+
+    def _intern_name(self, key):
+        id = self._ids.get(key)
+        if id is None:
+            id = self._append()
+            self._ids[key] = id
+            self._names[id] = key
+            self._buffer += bytes(self._size)
+        return id
+
+    def _append(self):
+        self._parent_starts.append(0)
+        self._parent_ends.append(0)
+        self._child_offsets = None
+        return len(self._parent_starts) - 1
+
+    def _find(self, encoded):
+        slots, buffer, size = self._slots, self._buffer, self._size
+        mask = len(slots) - 1
+        slot = hash(encoded) & mask
+        while True:
+            id = slots[slot]
+            if id < 0 or buffer.startswith(encoded, id * size):
+                return slot
+            slot = (slot + 1) & mask
+
+    def _resize(self):
+        self._slots = array('i', [-1]) * (4 * len(self._slots))
+        for id in range(len(self._buffer) // self._size):
+            if id not in self._names:
+                start = id * self._size
+                encoded = bytes(self._buffer[start:start + self._size])
+                self._slots[self._find(encoded)] = id
+
+    def _link(self, parent, child):
+        self._edge_parents.append(parent)
+        self._edge_children.append(child)
+        self._child_offsets = None
+
+    def _index_children(self):
+        # Compressed sparse rows, keeping the order in which edges came in.
+        offsets = array('I', bytes(array('I').itemsize * (len(self) + 1)))
+        for parent in self._edge_parents:
+            offsets[parent + 1] += 1
+        for id in range(len(self)):
+            offsets[id + 1] += offsets[id]
+
+        children = array('i', bytes(self._edge_children.itemsize *
+                                    len(self._edge_children)))
+        positions = array('I', offsets)
+        for parent, child in zip(self._edge_parents, self._edge_children):
+            children[positions[parent]] = child
+            positions[parent] += 1
+
+        self._child_offsets = offsets
+        self._children = children
@@ -0,0 +1,44 @@
+from .watcher import REFS
+from .watcher import STAGE
+
+
+class LiveTree:
+
+    def __init__(self, git, include_commits=False, bounded=False,
+                 untracked=True):
+        self._git = git
+        self._include_commits = include_commits
+        self._bounded = bounded
+        self._untracked = untracked
+        self._commits = git.commit_cache() if include_commits else None
+        self._tree = None
+        self._tips = None
+
+    @property
+    def tree(self):
+        if self._tree is None:
+            self.refresh()
+        return self._tree
+
+    def refresh(self, changes=(REFS, STAGE)):
+        if self._tree is None or REFS in changes:
+            self._git.refresh()
+            tips = self._git.ref_tips()
+            if self._tree is None or tips != self._tips:
+                self._tree = self._git.tree(
+                    self._include_commits, self._bounded, self._commits,
+                    self._untracked)
+                self._tips = tips
+                return True
+
+        if STAGE in changes:
+            stage = self._git.stage(self._untracked)
+            if LiveTree._flags(stage) != LiveTree._flags(self._tree.head.stage):
+                self._tree.head.stage = stage
+                return True
+        return False
+
+    def _flags(stage):
+        if stage is None:
+            return None
+        return bool(stage.staged), bool(stage.unstaged), bool(stage.untracked)
@@ -0,0 +1,52 @@
+class RebasePlan:
+
+    def __init__(self, git, root):
+        self._git = git
+        self._tips = git.tips()
+        self._stale = set()
+        self._skipped = set()
+        self._visit(root, False)
+
+    @property
+    def skipped(self):
+        return len(self._skipped)
+
+    def is_stale(self, branch):
+        return branch.id in self._stale
+
+    def stack(self, branch, active=None):
+        # A chain of single children is rebased as one stack, which stops
+        # at the checked out branch so that it is never left behind.
+        stack = [branch]
+        while len(branch.children) == 1 and branch.id != active:
+            child = next(iter(branch.children.values()))
+            if child.id == '' or child.is_remote or not self.is_stale(child):
+                break
+            stack.append(child)
+            branch = child
+        return stack
+
+    def _visit(self, parent, is_moved, contained=None):
+        # Every child in the tree starts at the tip of its parent, so only
+        # parents moved by the pull, or rebased themselves, leave stale ones.
+        if parent.id != '':
+            contained = self._contained(parent)
+
+        for branch in parent.children.values():
+            if branch.id == '':
+                self._visit(branch, is_moved, contained)
+            elif branch.is_remote:
+                self._visit(branch, False)
+            elif is_moved or contained is not None \
+                    and branch.id not in contained:
+                self._stale.add(branch.id)
+                self._visit(branch, True)
+            else:
+                self._skipped.add(branch.id)
+                self._visit(branch, False)
+
+    def _contained(self, parent):
+        tip = self._tips.get(parent.id)
+        if tip is None or tip == parent.ref:
+            return None
+        return self._git.branches_containing(tip)
@@ -0,0 +1,40 @@
+class ReachabilityIndex:
+
+    def __init__(self, graph):
+        self._graph = graph
+        self._masks = []
+        self._full_mask = 0
+
+    def add(self, id):
+        self._grow()
+        self._spread(id, self._masks[id])
+
+    def mark(self, id):
+        self._grow()
+        bit = 1 << self._full_mask.bit_length()
+        self._full_mask |= bit
+        self._spread(id, bit)
+
+    def reaches_all(self, id):
+        if id is None or id >= len(self._masks):
+            return self._full_mask == 0
+        return self._masks[id] == self._full_mask
+
+    def _grow(self):
+        missing = len(self._graph) - len(self._masks)
+        if missing > 0:
+            self._masks.extend([0] * missing)
+
+    def _spread(self, id, mask):
+        # Every commit keeps one bit per marked tip it is an ancestor of.
+        # Bits only ever get added, so each one crosses every edge once.
+        self._masks[id] |= mask
+        stack = [id]
+        while len(stack) > 0:
+            child = stack.pop()
+            mask = self._masks[child]
+            for parent in self._graph.parents(child):
+                missing = mask & ~self._masks[parent]
+                if missing:
+                    self._masks[parent] |= missing
+                    stack.append(parent)
@@ -0,0 +1,133 @@
+import os
+import queue
+import shutil
+import tempfile
+
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from subprocess import CalledProcessError
+
+from .display import Message
+from .git import Git
+
+
+class ParallelRebase:
+
+    def __init__(self, git, display, jobs, plan=None):
+        self._git = git
+        self._display = display
+        self._jobs = max(1, jobs)
+        self._plan = plan
+        self._worktrees = queue.Queue()
+        self._paths = []
+
+    def run(self, root):
+        self._display.message(
+            "Rebasing any '{}' child branches in {} worktrees ...",
+            root.id, self._jobs)
+        self._active = self._git.branch()
+        self._has_update_refs = self._git.has_update_refs()
+        self._directory = tempfile.mkdtemp(prefix='branch-')
+        try:
+            self._add_worktrees(root)
+            with ThreadPoolExecutor(max_workers=self._jobs) as executor:
+                self._rebase_tree(executor, root)
+        finally:
+            self._remove_worktrees()
+            # The worktrees moved branches behind the back of the main
+            # worktree, whose refs are read again from here on.
+            self._git.refresh()
+
+    def _rebase_tree(self, executor, root):
+        pending = {}
+        self._schedule(executor, pending, root)
+        while len(pending) > 0:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stack, parent = pending.pop(future)
+                names = "', '".join(branch.id for branch in stack)
+                try:
+                    future.result()
+                except CalledProcessError:
+                    self._display.message(
+                        "  Could not rebase '{0}' over '{1}'," +
+                        " skipping its child branches.",
+                        names, parent.id, type=Message.error)
+                    continue
+
+                self._display.message(
+                    "  Rebased '{0}' over '{1}'.", names, parent.id)
+                self._schedule(executor, pending, stack[-1])
+
+    def _schedule(self, executor, pending, parent):
+        # Siblings are independent, but every branch waits for its parent.
+        for branch in parent.children.values():
+            if branch.is_remote or not self._is_stale(branch):
+                self._schedule(executor, pending, branch)
+                continue
+
+            stack = self._stack(branch)
+            future = executor.submit(
+                self._rebase, stack[-1].id, parent.id, len(stack) > 1)
+            pending[future] = (stack, parent)
+
+    def _stack(self, branch):
+        # The checked out branch ends a stack, so it is only ever moved by
+        # a rebase in the main worktree.
+        if self._plan is None or not self._has_update_refs:
+            return [branch]
+        return self._plan.stack(branch, self._active)
+
+    def _rebase(self, branch, over, update_refs):
+        if branch == self._active:
+            self._rebase_in(self._git, branch, over, update_refs)
+            return
+
+        path = self._acquire_worktree()
+        try:
+            git = Git(path)
+            self._rebase_in(git, branch, over, update_refs)
+            git.detach()
+        finally:
+            self._worktrees.put(path)
+
+    def _rebase_in(self, git, branch, over, update_refs):
+        try:
+            git.rebase(branch, over, quiet=True, update_refs=update_refs)
+        except CalledProcessError:
+            git.abort_rebase()
+            raise
+
+    def _acquire_worktree(self):
+        return self._worktrees.get()
+
+    def _add_worktrees(self, root):
+        # Git reads the administrative files of every worktree while
+        # rebasing, so they are all added before any rebase starts.
+        count = min(self._jobs, self._count_branches(root))
+        for index in range(count):
+            path = os.path.join(self._directory, str(index))
+            self._git.add_worktree(path)
+            self._paths.append(path)
+            self._worktrees.put(path)
+
+    def _count_branches(self, parent):
+        count = 0
+        for branch in parent.children.values():
+            if not branch.is_remote and branch.id != self._active \
+                    and self._is_stale(branch):
+                count += 1
+            count += self._count_branches(branch)
+        return count
+
+    def _is_stale(self, branch):
+        return self._plan is None or self._plan.is_stale(branch)
+
+    def _remove_worktrees(self):
+        for path in self._paths:
+            try:
+                self._git.remove_worktree(path)
+            except CalledProcessError:
+                pass
+        shutil.rmtree(self._directory, ignore_errors=True)
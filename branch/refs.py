@@ -0,0 +1,197 @@
+import os
+
+
+SYMBOLIC_PREFIX = 'ref: '
+GITDIR_PREFIX = 'gitdir: '
+HEADS = 'refs/heads/'
+REMOTES = 'refs/remotes/'
+MAX_SYMBOLIC_DEPTH = 5
+
+
+class RefStore:
+
+    def open(path=None):
+        directories = RefStore._find_directories(path or os.getcwd())
+        if directories is None:
+            return None
+
+        git_dir, common_dir = directories
+        # Only the files backend is understood here.
+        if os.path.isdir(os.path.join(common_dir, 'reftable')):
+            return None
+        return RefStore(git_dir, common_dir)
+
+    def _find_directories(path):
+        git_dir = os.environ.get('GIT_DIR')
+        if git_dir is None:
+            git_dir = RefStore._discover(os.path.abspath(path))
+        if git_dir is None:
+            return None
+        if not os.path.isfile(os.path.join(git_dir, 'HEAD')):
+            return None
+
+        common_dir = os.environ.get('GIT_COMMON_DIR')
+        if common_dir is None:
+            common_dir = git_dir
+            commondir = RefStore._read(os.path.join(git_dir, 'commondir'))
+            if commondir is not None:
+                common_dir = os.path.join(git_dir, commondir)
+        return os.path.normpath(git_dir), os.path.normpath(common_dir)
+
+    def _discover(path):
+        while True:
+            candidate = os.path.join(path, '.git')
+            if os.path.isdir(candidate):
+                return candidate
+
+            content = RefStore._read(candidate)
+            if content is not None and content.startswith(GITDIR_PREFIX):
+                return os.path.join(path, content[len(GITDIR_PREFIX):])
+
+            parent = os.path.dirname(path)
+            if parent == path:
+                return None
+            path = parent
+
+    def _read(path):
+        try:
+            with open(path, 'r') as file:
+                return file.read().strip()
+        except OSError:
+            return None
+
+    def __init__(self, git_dir, common_dir):
+        self._git_dir = git_dir
+        self._common_dir = common_dir
+        self._refs = None
+        self._peeled = {}
+
+    @property
+    def git_dir(self):
+        return self._git_dir
+
+    @property
+    def common_dir(self):
+        return self._common_dir
+
+    def reload(self):
+        self._refs = None
+        self._peeled = {}
+
+    def head(self):
+        return self.resolve('HEAD')
+
+    def head_ref(self):
+        content = RefStore._read(os.path.join(self._git_dir, 'HEAD'))
+        if content is None or not content.startswith(SYMBOLIC_PREFIX):
+            return None
+        return content[len(SYMBOLIC_PREFIX):]
+
+    def resolve(self, name):
+        refs = self._load()
+        if name == 'HEAD':
+            value = RefStore._read(os.path.join(self._git_dir, 'HEAD'))
+        else:
+            value = refs.get(name)
+
+        for _ in range(MAX_SYMBOLIC_DEPTH):
+            if value is None or not value.startswith(SYMBOLIC_PREFIX):
+                return value
+            value = refs.get(value[len(SYMBOLIC_PREFIX):])
+        return None
+
+    def peeled(self, name):
+        self._load()
+        return self._peeled.get(name) or self.resolve(name)
+
+    def refs(self, *prefixes):
+        result = {}
+        for name in self._load():
+            if len(prefixes) == 0 or name.startswith(prefixes):
+                commit = self.resolve(name)
+                if commit is not None:
+                    result[name] = commit
+        return result
+
+    def branches(self):
+        return sorted(name[len(HEADS):] for name in self.refs(HEADS))
+
+    def branch_names(self):
+        # Only names are needed here, so loose refs are never opened.
+        names = set()
+        marker = ' ' + HEADS
+        try:
+            with open(os.path.join(self._common_dir, 'packed-refs'), 'r') \
+                    as file:
+                for line in file:
+                    index = line.find(marker)
+                    if index >= 0:
+                        names.add(line[index + len(marker):].rstrip('\n'))
+        except OSError:
+            pass
+
+        root = os.path.join(self._common_dir, HEADS)
+        for directory, _, files in os.walk(root):
+            prefix = RefStore._prefix(root, directory, '')
+            names.update(
+                prefix + file for file in files if not file.endswith('.lock'))
+        return sorted(names)
+
+    def remote_branches(self):
+        refs = self._load()
+        return sorted(
+            name[len(REMOTES):]
+            for name
+            in self.refs(REMOTES)
+            if not refs[name].startswith(SYMBOLIC_PREFIX)
+        )
+
+    def _load(self):
+        if self._refs is None:
+            refs, peeled = self._read_packed_refs()
+            for name, value in self._read_loose_refs().items():
+                refs[name] = value
+                peeled.pop(name, None)
+            self._peeled = peeled
+            self._refs = refs
+        return self._refs
+
+    def _read_packed_refs(self):
+        refs, peeled, name = {}, {}, None
+        path = os.path.join(self._common_dir, 'packed-refs')
+        try:
+            with open(path, 'r') as file:
+                for line in file:
+                    line = line.rstrip('\n')
+                    if line == '' or line.startswith('#'):
+                        continue
+                    if line.startswith('^'):
+                        if name is not None:
+                            peeled[name] = line[1:]
+                        continue
+                    commit, name = line.split(' ', 1)
+                    refs[name] = commit
+        except OSError:
+            pass
+        return refs, peeled
+
+    def _read_loose_refs(self):
+        refs = {}
+        root = os.path.join(self._common_dir, 'refs')
+        for directory, _, files in os.walk(root):
+            prefix = RefStore._prefix(root, directory, 'refs/')
+            for file in files:
+                if file.endswith('.lock'):
+                    continue
+                content = RefStore._read(os.path.join(directory, file))
+                if not content:
+                    continue
+                refs[prefix + file] = content
+        return refs
+
+    def _prefix(root, directory, name):
+        # Ref names below a directory share its path relative to the root.
+        relative = directory[len(root):].lstrip(os.sep)
+        if relative == '':
+            return name
+        return name + relative.replace(os.sep, '/') + '/'
@@ -1,43 +1,62 @@
-from .commit import Commit
-
 COMMIT_FORMAT = '{0}     ({1}) {2}'
 ACTIVE_BRANCH_TEMPLATE = '{} [*{}*]'
 INCATIVE_BRANCH_TEMPLATE = '{} [ {} ]'
 BRANCH_ALIAS_TEMPLATE = '[ {} ]'
+MORE_ALIASES_TEMPLATE = '[ +{} more ]'
 LINE_LENGTH = 80
 
 
 class TreeRenderer:
 
     def render_tree(self, tree):
-        canvas = []
-        self._render(tree.root, canvas, '', '  ')
-        return canvas
-
-    def _render(self, branch, canvas, offset, prefix):
-        for i, key in enumerate(branch.children):
-            child = branch.children[key]
-            new_offset = offset.replace('.', ' ').replace('+', '|')
-            new_offset += '   {}'.format(['+', '.'][i == 0])
-            self._render(child, canvas, new_offset, '->')
-
-        self._render_branch(canvas, offset + prefix, branch)
-        self._render_stage(canvas, offset, branch)
+        # Children are rendered above their parent, so a branch is only
+        # rendered once it comes back up the stack.
+        stack = [(tree.root, '', '  ', '', False)]
+        while len(stack) > 0:
+            branch, offset, prefix, indent, is_expanded = stack.pop()
+            if is_expanded:
+                yield from self._render(branch, offset, prefix, indent)
+                continue
+
+            stack.append((branch, offset, prefix, indent, True))
+            children = list(branch.children.values())
+            for i in range(len(children) - 1, -1, -1):
+                marker, line = ('.', ' ') if i == 0 else ('+', '|')
+                stack.append((
+                    children[i],
+                    indent + '   ' + marker,
+                    '->',
+                    indent + '   ' + line,
+                    False
+                ))
+
+    def _render(self, branch, offset, prefix, indent):
+        yield self._render_branch(offset + prefix, branch)
+
+        # Commit lines continue every marker of the branch as a bar.
+        offset = offset[:-1] + '|' if offset != '' else offset
+        yield from self._render_stage(offset, branch)
         for commit in branch.commits:
-            self._render_commit(canvas, offset, commit)
+            yield self._render_commit(offset, commit)
 
-    def _render_branch(self, canvas, prefix, branch):
+    def _render_branch(self, prefix, branch):
         parts = [self._render_branch_name(prefix, branch)]
         aliases = sorted(branch.aliases, key=lambda s: len(s))
         for alias in aliases:
             parts.append(BRANCH_ALIAS_TEMPLATE.format(alias))
-        result = ''.join(parts)
-        extra = 0
-        while len(result) > LINE_LENGTH:
-            parts.pop()
-            extra += 1
-            result = ''.join(parts) + '[ +{} more ]'.format(extra)
-        canvas.append(result)
+
+        widths = [0]
+        for part in parts:
+            widths.append(widths[-1] + len(part))
+        if widths[-1] <= LINE_LENGTH:
+            return ''.join(parts)
+
+        count = len(parts) - 1
+        more = MORE_ALIASES_TEMPLATE.format(len(parts) - count)
+        while widths[count] + len(more) > LINE_LENGTH:
+            count -= 1
+            more = MORE_ALIASES_TEMPLATE.format(len(parts) - count)
+        return ''.join(parts[:count]) + more
 
     def _render_branch_name(self, prefix, branch):
         template = ACTIVE_BRANCH_TEMPLATE \
@@ -50,19 +69,57 @@ class TreeRenderer:
 
         return result
 
-    def _render_stage(self, canvas, offset, branch):
+    def _render_stage(self, offset, branch):
         if branch.stage is None:
             return
         if branch.stage.staged:
-            self._render_changes(canvas, offset, 'staged changes')
+            yield self._render_changes(offset, 'staged changes')
         if branch.stage.unstaged:
-            self._render_changes(canvas, offset, 'unstaged changes')
+            yield self._render_changes(offset, 'unstaged changes')
         if branch.stage.untracked:
-            self._render_changes(canvas, offset, 'untracked files')
+            yield self._render_changes(offset, 'untracked files')
+
+    def _render_commit(self, offset, commit):
+        return self._render_changes(offset, commit.id[:7:], commit.message)
+
+    def _render_changes(self, offset, id, title=''):
+        return COMMIT_FORMAT.format(offset, id, title)
+
+
+class TreeJsonRenderer:
+
+    def render_tree(self, tree):
+        import json
+
+        yield json.dumps(self.serialize(tree), sort_keys=True)
 
-    def _render_commit(self, canvas, offset, commit):
-        self._render_changes(canvas, offset, commit.id[:7:], commit.message)
+    def serialize(self, tree):
+        return {
+            'head': tree.head.ref if tree.head is not None else None,
+            'root': tree.root.ref if tree.root is not None else None,
+            'branches': [self._serialize_branch(b) for b in tree.branches]
+        }
 
-    def _render_changes(self, canvas, offset, id, title=''):
-        offset = offset.replace('.', '|').replace('+', '|')
-        canvas.append(COMMIT_FORMAT.format(offset, id, title))
+    def _serialize_branch(self, branch):
+        stage = None
+        if branch.stage is not None:
+            stage = {
+                'staged': bool(branch.stage.staged),
+                'unstaged': bool(branch.stage.unstaged),
+                'untracked': bool(branch.stage.untracked)
+            }
+        return {
+            'ref': branch.ref,
+            'id': branch.id,
+            'names': sorted(branch.names),
+            'aliases': sorted(branch.aliases),
+            'is_active': branch.is_active,
+            'is_remote': branch.is_remote,
+            'children': [child.ref for child in branch.children.values()],
+            'commits': [
+                {'id': commit.id, 'message': commit.message}
+                for commit
+                in branch.commits
+            ],
+            'stage': stage
+        }
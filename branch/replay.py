@@ -0,0 +1,137 @@
+from .display import Message
+
+
+class ReplayConflict(Exception):
+    pass
+
+
+class InMemoryRebase:
+
+    def __init__(self, git, display):
+        self._git = git
+        self._display = display
+        self._trees = {}
+
+    def run(self, root):
+        self._active = self._git.current_branch()
+        self._head = self._git.rev_parse('HEAD')
+        self._pending = None
+        self._has_checked_out = False
+        self._conflicts = []
+
+        try:
+            upstream = self._pull(root)
+            self._display.message(
+                "Replaying any '{}' child branches...", root.id)
+            if upstream is None:
+                self._replay_children(root, root.ref)
+            else:
+                self._replay_branch(root, upstream)
+        finally:
+            self._restore()
+
+        # Conflicting branches are rebased in the working tree only once
+        # every clean replay is done and the checked out branch has moved.
+        while len(self._conflicts) > 0:
+            self._rebase(*self._conflicts.pop(0))
+        self._restore()
+
+    def _pull(self, root):
+        self._display.message('Fetching remote {} ...', root.id)
+        self._git.fetch()
+
+        upstream = self._git.upstream(root.id) if root.id != '' else None
+        if upstream is None:
+            self._display.message(
+                "'{}' has no upstream branch.", root.id, type=Message.warning)
+            return None
+        return self._git.rev_parse(upstream)
+
+    def _replay_children(self, parent, over):
+        for branch in parent.children.values():
+            if branch.id == '':
+                self._replay_children(branch, over)
+            elif branch.is_remote:
+                tip = self._git.rev_parse(branch.id)
+                self._replay_children(branch, tip)
+            else:
+                self._display.message(
+                    "  Replaying '{0}' over '{1}' ...", branch.id, parent.id)
+                self._replay_branch(branch, over)
+
+    def _replay_branch(self, branch, over):
+        tip = self._replay(branch.id, over)
+        if tip is None:
+            self._display.message(
+                "  '{}' has conflicts, rebasing it in the working tree later.",
+                branch.id, type=Message.warning)
+            self._conflicts.append((branch, over))
+        else:
+            self._replay_children(branch, tip)
+
+    def _rebase(self, branch, over):
+        self._display.message(
+            "  Rebasing '{}' in the working tree ...", branch.id)
+        self._has_checked_out = True
+        self._git.rebase(branch.id, over)
+        self._replay_children(branch, self._git.rev_parse(branch.id))
+
+    def _replay(self, branch, over):
+        old = self._git.rev_parse(branch)
+        try:
+            new = self._replay_commits(branch, over)
+        except ReplayConflict:
+            return None
+
+        if new == old:
+            return old
+
+        # The checked out branch moves together with the working tree, once.
+        if branch == self._active and not self._has_checked_out:
+            self._pending = new
+        else:
+            self._git.update_ref(branch, new, old)
+        return new
+
+    def _replay_commits(self, branch, over):
+        base = over
+        for commit in self._git.replayed_commits(branch, over):
+            content = self._git.read_commit(commit)
+            parent, author, message = self._parse(content)
+            if parent == base:
+                base = commit
+                continue
+
+            tree, is_clean = self._git.merge_tree(parent, base, commit)
+            if not is_clean:
+                raise ReplayConflict(commit)
+            if tree == self._tree(base):
+                continue
+
+            base = self._git.commit_tree(tree, base, message, author)
+            self._trees[base] = tree
+        return base
+
+    def _tree(self, commit):
+        if commit not in self._trees:
+            self._trees[commit] = self._git.rev_parse(commit + '^{tree}')
+        return self._trees[commit]
+
+    def _parse(self, content):
+        headers, _, message = content.partition('\n\n')
+        parent, author = None, None
+        for line in headers.split('\n'):
+            if line.startswith('parent ') and parent is None:
+                parent = line[len('parent '):]
+            elif line.startswith('author '):
+                name, identity = line[len('author '):].split(' <', 1)
+                email, date = identity.split('> ', 1)
+                author = (name, email, date)
+        return parent, author, message
+
+    def _restore(self):
+        if self._pending is not None:
+            self._git.reset_keep(self._pending)
+            self._pending = None
+        if self._has_checked_out:
+            self._git.checkout(self._active or self._head)
@@ -0,0 +1,204 @@
+import os
+import resource
+import sys
+import threading
+import time
+
+
+VARIABLE = 'BRANCH_TRACE'
+STDERR = '-'
+STDERR_VALUES = ['1', 'true', 'yes', 'stderr', STDERR]
+SUMMARY_TEMPLATE = '[ TRACE ] {0:>9.4f}s wall {1:>9.4f}s cpu  {2}'
+MEMORY_TEMPLATE = '[ TRACE ] peak memory {0:.1f} MiB, git {1:.1f} MiB'
+
+
+class Span:
+
+    def __init__(self, tracer, name, category, args):
+        self._tracer = tracer
+        self._name = name
+        self._category = category
+        self._args = args
+        self._thread = threading.get_ident()
+        self._start = None
+        self._wall = None
+        self._cpu = None
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def category(self):
+        return self._category
+
+    @property
+    def args(self):
+        return self._args
+
+    @property
+    def thread(self):
+        return self._thread
+
+    @property
+    def start(self):
+        return self._start
+
+    @property
+    def wall(self):
+        return self._wall
+
+    @property
+    def cpu(self):
+        return self._cpu
+
+    def __enter__(self):
+        return self.begin()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.end()
+
+    def begin(self):
+        self._start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+        return self
+
+    def end(self):
+        self._wall = time.perf_counter() - self._start
+        self._cpu = time.thread_time() - self._cpu_start
+        self._tracer.record(self)
+
+    def set(self, key, value):
+        self._args[key] = value
+
+    def add(self, key, amount):
+        self._args[key] = self._args.get(key, 0) + amount
+
+
+class NullSpan:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def begin(self):
+        return self
+
+    def end(self):
+        pass
+
+    def set(self, key, value):
+        pass
+
+    def add(self, key, amount):
+        pass
+
+
+class Tracer:
+
+    def __init__(self, destination=STDERR):
+        self._destination = destination
+        self._origin = time.perf_counter()
+        self._spans = []
+        self._lock = threading.Lock()
+
+    @property
+    def spans(self):
+        return list(self._spans)
+
+    def span(self, name, category, args):
+        return Span(self, name, category, args)
+
+    def record(self, span):
+        with self._lock:
+            self._spans.append(span)
+
+    def report(self):
+        if self._destination == STDERR:
+            for line in self.summary():
+                print(line, file=sys.stderr)
+            return
+
+        import json
+
+        with open(self._destination, 'w') as file:
+            json.dump(self.chrome_trace(), file)
+
+    def summary(self):
+        lines = []
+        for span in sorted(self._spans, key=lambda span: span.start):
+            details = ' '.join(
+                '{}={}'.format(key, value)
+                for key, value
+                in span.args.items()
+                if key != 'argv'
+            )
+            name = span.name
+            if 'argv' in span.args:
+                name = ' '.join(span.args['argv'])
+            lines.append(SUMMARY_TEMPLATE.format(
+                span.wall, span.cpu, (name + '  ' + details).rstrip()))
+
+        own, children = Tracer.peak_memory()
+        lines.append(MEMORY_TEMPLATE.format(own / 1024, children / 1024))
+        return lines
+
+    def chrome_trace(self):
+        events = [
+            {
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': (span.start - self._origin) * 1e6,
+                'dur': span.wall * 1e6,
+                'pid': os.getpid(),
+                'tid': span.thread,
+                'args': dict(span.args, cpu=span.cpu)
+            }
+            for span
+            in self._spans
+        ]
+        own, children = Tracer.peak_memory()
+        return {
+            'traceEvents': events,
+            'otherData': {'peak_kib': own, 'git_peak_kib': children}
+        }
+
+    def peak_memory():
+        # Linux reports the peak resident set size in KiB.
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        return own, children
+
+
+NULL_SPAN = NullSpan()
+_tracer = None
+
+
+def start(destination=STDERR):
+    global _tracer
+    if _tracer is None:
+        if not destination or destination.lower() in STDERR_VALUES:
+            destination = STDERR
+        _tracer = Tracer(destination)
+    return _tracer
+
+
+def stop():
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.report()
+    return tracer
+
+
+def is_enabled():
+    return _tracer is not None
+
+
+def span(name, category='branch', **args):
+    if _tracer is None:
+        return NULL_SPAN
+    return _tracer.span(name, category, args)
@@ -1,5 +1,3 @@
-import re
-
 from .branch import Branch
 from .commit import Commit
 
@@ -0,0 +1,205 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_ISDIR = 0x40000000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | \
+    IN_CREATE | IN_DELETE | IN_DELETE_SELF
+
+EVENT_HEADER = struct.Struct('iIII')
+READ_SIZE = 1 << 16
+DEBOUNCE = 0.05
+POLL_INTERVAL = 1.0
+
+REFS = 'refs'
+STAGE = 'stage'
+
+
+class Watcher:
+
+    def open(git_dir, common_dir, debounce=DEBOUNCE):
+        watcher = InotifyWatcher.open(git_dir, common_dir, debounce)
+        if watcher is not None:
+            return watcher
+        return PollingWatcher(git_dir, common_dir, debounce)
+
+    def classify(git_dir, common_dir, path):
+        name = os.path.basename(path)
+        if name.endswith('.lock'):
+            return None
+        if path == os.path.join(git_dir, 'index'):
+            return STAGE
+        if path == os.path.join(git_dir, 'HEAD') \
+                or path == os.path.join(common_dir, 'packed-refs') \
+                or path.startswith(os.path.join(common_dir, 'refs') + os.sep):
+            return REFS
+        return None
+
+
+class InotifyWatcher:
+
+    def open(git_dir, common_dir, debounce):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            descriptor = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if descriptor < 0:
+            return None
+        return InotifyWatcher(libc, descriptor, git_dir, common_dir, debounce)
+
+    def __init__(self, libc, descriptor, git_dir, common_dir, debounce):
+        self._libc = libc
+        self._descriptor = descriptor
+        self._git_dir = git_dir
+        self._common_dir = common_dir
+        self._debounce = debounce
+        self._directories = {}
+        self._add(git_dir)
+        self._add(common_dir)
+        self._add_tree(os.path.join(common_dir, 'refs'))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self._descriptor is not None:
+            os.close(self._descriptor)
+            self._descriptor = None
+
+    def wait(self, timeout=None):
+        # Git replaces several files for a single command, so the changes
+        # are collected until the repository goes quiet for a moment.
+        changes = set()
+        if not self._is_readable(timeout):
+            return changes
+        while True:
+            changes.update(self._read())
+            if not self._is_readable(self._debounce):
+                return changes
+
+    def _is_readable(self, timeout):
+        readable, _, _ = select.select([self._descriptor], [], [], timeout)
+        return len(readable) > 0
+
+    def _read(self):
+        try:
+            data = os.read(self._descriptor, READ_SIZE)
+        except BlockingIOError:
+            return set()
+
+        changes, offset = set(), 0
+        while offset < len(data):
+            watch, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            directory = self._directories.get(watch)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._directories[watch]
+                continue
+
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._add_tree(path)
+            change = Watcher.classify(self._git_dir, self._common_dir, path)
+            if change is not None:
+                changes.add(change)
+        return changes
+
+    def _add_tree(self, root):
+        for directory, _, _ in os.walk(root):
+            self._add(directory)
+
+    def _add(self, directory):
+        watch = self._libc.inotify_add_watch(
+            self._descriptor, os.fsencode(directory), WATCH_MASK)
+        if watch >= 0:
+            self._directories[watch] = directory
+
+
+class PollingWatcher:
+
+    def __init__(self, git_dir, common_dir, debounce):
+        self._git_dir = git_dir
+        self._common_dir = common_dir
+        self._debounce = debounce
+        self._snapshot = self._take_snapshot()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        pass
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self._take_snapshot()
+            changes = self._compare(self._snapshot, snapshot)
+            self._snapshot = snapshot
+            if len(changes) > 0:
+                time.sleep(self._debounce)
+                snapshot = self._take_snapshot()
+                changes.update(self._compare(self._snapshot, snapshot))
+                self._snapshot = snapshot
+                return changes
+
+            interval = POLL_INTERVAL
+            if deadline is not None:
+                interval = min(interval, deadline - time.monotonic())
+                if interval <= 0:
+                    return changes
+            time.sleep(interval)
+
+    def _compare(self, before, after):
+        changes = set()
+        for path in before.keys() | after.keys():
+            if before.get(path) != after.get(path):
+                change = Watcher.classify(
+                    self._git_dir, self._common_dir, path)
+                if change is not None:
+                    changes.add(change)
+        return changes
+
+    def _take_snapshot(self):
+        paths = [
+            os.path.join(self._git_dir, 'HEAD'),
+            os.path.join(self._git_dir, 'index'),
+            os.path.join(self._common_dir, 'packed-refs')
+        ]
+        for directory, _, files in os.walk(
+                os.path.join(self._common_dir, 'refs')):
+            paths.extend(os.path.join(directory, file) for file in files)
+
+        snapshot = {}
+        for path in paths:
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (status.st_mtime_ns, status.st_size, status.st_ino)
+        return snapshot
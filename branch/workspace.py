@@ -0,0 +1,121 @@
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+
+from .controller import FixedController
+from .display import Message
+
+
+RENDER = 'render'
+MESSAGE = 'message'
+UNSUPPORTED_COMMANDS = ['daemon']
+UNSUPPORTED_OPTIONS = ['watch']
+
+
+class BufferedDisplay:
+
+    def __init__(self):
+        self._entries = []
+
+    @property
+    def entries(self):
+        return self._entries
+
+    def message(self, *parts, type=Message.info):
+        self._entries.append((MESSAGE, parts[0].format(*parts[1:]), type))
+
+    def render(self, rendering):
+        self._entries.append((RENDER, list(rendering), None))
+
+    def redraw(self, rendering):
+        self.render(rendering)
+
+
+class Workspace:
+
+    def find(paths):
+        repositories = []
+        for path in paths:
+            if Workspace._is_repository(path):
+                repositories.append(path)
+                continue
+            for name in sorted(os.listdir(path)):
+                candidate = os.path.join(path, name)
+                if Workspace._is_repository(candidate):
+                    repositories.append(candidate)
+        return repositories
+
+    def _is_repository(path):
+        return os.path.exists(os.path.join(path, '.git'))
+
+    def __init__(self, display, paths, jobs=None):
+        self._display = display
+        self._paths = paths
+        self._jobs = jobs or os.cpu_count() or 1
+
+    def run(self, command, options):
+        if command in UNSUPPORTED_COMMANDS or any(
+                options.get(option) for option in UNSUPPORTED_OPTIONS):
+            self._display.message(
+                'This command runs in a single repository only.',
+                type=Message.error)
+            return
+
+        try:
+            repositories = Workspace.find(self._paths)
+        except OSError as error:
+            self._display.message(
+                "Cannot read the workspace '{}': {}.", error.filename,
+                error.strerror, type=Message.error)
+            return
+
+        options = dict(options, workspace=None, trace=False)
+        failed = 0
+        if len(repositories) > 0:
+            # Every repository runs in its own process, and its output is
+            # shown as soon as it finishes, whatever the others are doing.
+            with ProcessPoolExecutor(
+                    max_workers=min(self._jobs, len(repositories))) \
+                    as executor:
+                futures = {
+                    executor.submit(
+                        Workspace._run_repository, path, command, options
+                    ): path
+                    for path
+                    in repositories
+                }
+                for future in as_completed(futures):
+                    if not self._show(futures[future], future):
+                        failed += 1
+
+        self._display.message(
+            'Finished {} repositories, {} failed.', len(repositories), failed,
+            type=Message.warning if failed > 0 else Message.info)
+
+    def _show(self, path, future):
+        self._display.message('{}:', path)
+        try:
+            entries = future.result()
+        except Exception as error:
+            self._display.message(
+                '  Failed: {}', str(error).strip(), type=Message.error)
+            return False
+
+        for kind, content, type in entries:
+            if kind == RENDER:
+                self._display.render(content)
+            else:
+                self._display.message('  {}', content, type=type)
+        return True
+
+    def _run_repository(path, command, options):
+        from .engine import Engine
+        from .git import Git
+
+        display = BufferedDisplay()
+        Engine(
+            Git(os.path.abspath(path)), display,
+            FixedController(command, options)
+        ).run()
+        return display.entries
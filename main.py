@@ -1,8 +1,34 @@
-from branch.controller import Controller
-from branch.display import Display
-from branch.display import Message
-from branch.engine import Engine
-from branch.git import Git
+import os
+import sys
+
+
+COMPLETE_COMMAND = '__complete'
+
+
+def complete(words):
+    from branch.completion import Completion
+    candidates = Completion().complete(words)
+    if len(candidates) > 0:
+        sys.stdout.write('\n'.join(candidates) + '\n')
+
+
+def query_daemon(arguments):
+    from branch.client import Client
+    request = Client.parse(arguments)
+    if request is None:
+        return False
+
+    client = Client.find()
+    response = client.request(request) if client is not None else None
+    if response is None:
+        return False
+
+    output = sys.stdout
+    for line in response['lines']:
+        output.write(line)
+        output.write('\n')
+    output.write('\n\n')
+    return True
 
 
 #
@@ -10,9 +36,29 @@ from branch.git import Git
 #
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == [COMPLETE_COMMAND]:
+        complete(sys.argv[2:])
+        sys.exit(0)
+
+    if query_daemon(sys.argv[1:]):
+        sys.exit(0)
+
+    from branch import trace
+    from branch.controller import Controller
+    from branch.display import Display
+    from branch.display import Message
+    from branch.engine import Engine
+    from branch.git import Git
+
+    if os.environ.get(trace.VARIABLE):
+        trace.start(os.environ[trace.VARIABLE])
+
     try:
         Engine(Git(), Display(), Controller()).run()
 
     except Exception as e:
         # Display().message('Operation failed:\n  ' + str(e), type=Message.error)
         raise
+
+    finally:
+        trace.stop()
@@ -0,0 +1,74 @@
+import os
+import unittest
+from subprocess import PIPE
+from subprocess import run
+from unittest import mock
+
+from benchmark.compare import compare
+from benchmark.repository import Scenario
+from benchmark.repository import SyntheticRepository
+from benchmark.suite import Suite
+from branch.cache import GraphCache
+
+
+class SyntheticRepositoryTest(unittest.TestCase):
+
+    def git(self, repository, *command):
+        process = run(('git',) + command, cwd=repository.path, stdout=PIPE)
+        process.check_returncode()
+        return process.stdout.decode('utf-8').split()
+
+    def test_generates_branches_aliases_and_remotes(self):
+        scenario = Scenario(
+            branches=5, depth=2, history=20, aliases=2, remotes=3, commits=2)
+        with SyntheticRepository(scenario) as repository:
+            heads = self.git(
+                repository, 'for-each-ref', '--format=%(refname:short)',
+                'refs/heads/')
+            remotes = self.git(
+                repository, 'for-each-ref', '--format=%(refname:short)',
+                'refs/remotes/')
+            count = self.git(repository, 'rev-list', '--count', '--all')
+
+        self.assertEqual(len([h for h in heads if h.startswith('stack-')]), 5)
+        self.assertIn('stack-0-1', heads)
+        self.assertIn('alias-1', heads)
+        self.assertEqual(len(remotes), 4)
+        self.assertEqual(count, ['30'])
+
+
+class SuiteTest(unittest.TestCase):
+
+    def test_times_engine_runs_with_and_without_the_cache(self):
+        loads = []
+        load = GraphCache.load
+
+        def record(cache):
+            loads.append(os.path.exists(cache.path))
+            return load(cache)
+
+        scenario = Scenario(
+            branches=2, depth=1, history=10, aliases=0, remotes=0, commits=0)
+        with mock.patch.object(GraphCache, 'load', record):
+            results = Suite(scenario, repeat=2).run()
+
+        self.assertEqual(loads, [False, True, False, True])
+        self.assertEqual(results['phases']['engine']['runs'], 2)
+        self.assertEqual(results['phases']['cached']['runs'], 2)
+
+
+class CompareTest(unittest.TestCase):
+
+    def results(self, **walls):
+        return {'phases': {
+            phase: {'wall': wall, 'cpu': wall, 'runs': 1}
+            for phase, wall
+            in walls.items()
+        }}
+
+    def test_flags_slower_phases(self):
+        _, regressions = compare(
+            self.results(log=1.0, read=1.0),
+            self.results(log=1.05, read=1.5),
+            0.1)
+        self.assertEqual(regressions, ['read'])
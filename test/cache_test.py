@@ -0,0 +1,111 @@
+import os
+import unittest
+from unittest import mock
+
+from branch.cache import GraphCache
+from branch.git import Git
+from test.repository import Repository
+
+
+class GraphCacheTest(unittest.TestCase):
+
+    def test_missing_file_is_empty(self):
+        with Repository():
+            cache = GraphCache(os.path.join('.git', 'missing.json')).load()
+            self.assertEqual(cache.tips, set())
+            self.assertEqual(cache.entries, [])
+
+    def test_save_and_load(self):
+        with Repository():
+            path = os.path.join('.git', 'branch', 'graph.json')
+            GraphCache(path).save(['a1'], [('a1', ['b2'])])
+            cache = GraphCache(path).load()
+            self.assertEqual(cache.tips, {'a1'})
+            self.assertEqual(cache.entries, [('a1', ['b2'])])
+
+
+class CachedTreeTest(unittest.TestCase):
+
+    def describe(self, tree):
+        return {
+            branch.ref: (
+                sorted(branch.names),
+                sorted(branch.children.keys()),
+                [commit.id for commit in branch.commits]
+            )
+            for branch
+            in tree.branches
+        }
+
+    def fresh(self):
+        GraphCache(os.path.join('.git', 'branch', 'graph.json')).clear()
+        return self.describe(Git().tree(True))
+
+    def build(self, repository):
+        repository.commit('initial')
+        repository.commit('release')
+        repository.branch('feature')
+        repository.commit('fix')
+        repository.checkout('feature')
+        repository.commit('feature')
+
+    def test_creates_cache(self):
+        with Repository() as repository:
+            self.build(repository)
+            Git().tree(False)
+            cache = GraphCache(os.path.join('.git', 'branch', 'graph.json'))
+            self.assertIn(repository.head(), cache.load().tips)
+            self.assertGreater(len(cache.entries), 0)
+
+    def test_unchanged_refs_do_not_walk_history(self):
+        with Repository() as repository:
+            self.build(repository)
+            expected = self.describe(Git().tree(True))
+            with mock.patch.object(Git, '_log', side_effect=AssertionError):
+                self.assertEqual(self.describe(Git().tree(True)), expected)
+
+    def test_unchanged_history_is_not_saved_again(self):
+        with Repository() as repository:
+            self.build(repository)
+            Git().tree(True)
+            with mock.patch.object(
+                    GraphCache, 'save', side_effect=AssertionError):
+                Git().tree(True)
+
+    def test_new_commits_are_read_incrementally(self):
+        with Repository() as repository:
+            self.build(repository)
+            Git().tree(True)
+            previous = repository.head()
+            repository.commit('another feature')
+            repository.checkout('master')
+            repository.branch('fixes', 'HEAD~1')
+            repository.checkout('fixes')
+            repository.commit('another fix')
+
+            walks = []
+            log = Git._log
+
+            def spy(git, include=None, exclude=()):
+                walks.append((set(include or []), set(exclude)))
+                return log(git, include, exclude)
+
+            with mock.patch.object(Git, '_log', spy):
+                actual = self.describe(Git().tree(True))
+
+            self.assertIn(previous, walks[0][1])
+            self.assertEqual(actual, self.fresh())
+
+    def test_rebased_commits_are_dropped(self):
+        with Repository() as repository:
+            self.build(repository)
+            Git().tree(True)
+            repository.git('rebase', '--quiet', 'master', 'feature')
+            self.assertEqual(self.describe(Git().tree(True)), self.fresh())
+
+    def test_walks_below_cached_root(self):
+        with Repository() as repository:
+            self.build(repository)
+            Git().tree(True)
+            repository.branch('old', 'master~2')
+            self.assertEqual(self.describe(Git().tree(True)), self.fresh())
@@ -0,0 +1,123 @@
+import os
+import unittest
+from unittest import mock
+
+from branch.commitgraph import CommitGraph
+from branch.commitgraph import CommitGraphWalk
+from branch.git import Git
+from test.repository import Repository
+
+
+class CommitGraphTest(unittest.TestCase):
+
+    def build(self, repository):
+        repository.commit('initial')
+        repository.commit('release')
+        for name in ('one', 'two', 'three'):
+            repository.checkout('master')
+            repository.git('checkout', '--quiet', '-b', name)
+            repository.commit(name)
+        repository.checkout('master')
+        repository.git('merge', '--quiet', '--no-ff', '-m', 'two', 'one', 'two')
+        repository.git(
+            'merge', '--quiet', '--no-ff', '-m', 'octopus', 'two', 'three')
+
+    def parents(self, repository):
+        rows = repository.git('log', '--all', '--format=%H %P').split('\n')
+        return {
+            row.split(' ')[0]: row.split(' ')[1:] if row.count(' ') else []
+            for row
+            in rows
+        }
+
+    def graph_parents(self, graph, commits):
+        result = {}
+        for commit in commits:
+            position = graph.find(commit)
+            self.assertIsNotNone(position, commit)
+            result[commit] = [graph.oid(p) for p in graph.parents(position)]
+        return result
+
+    def test_missing_file(self):
+        with Repository() as repository:
+            repository.commit('initial')
+            self.assertIsNone(CommitGraph.open(os.path.join('.git', 'objects')))
+
+    def test_single_file(self):
+        with Repository() as repository:
+            self.build(repository)
+            repository.git('commit-graph', 'write', '--reachable')
+            expected = self.parents(repository)
+            with CommitGraph.open(os.path.join('.git', 'objects')) as graph:
+                actual = self.graph_parents(graph, expected.keys())
+                self.assertIsNone(graph.find('0' * 40))
+            self.assertEqual(actual, expected)
+
+    def test_split_chain(self):
+        with Repository() as repository:
+            self.build(repository)
+            repository.git('commit-graph', 'write', '--reachable', '--split')
+            repository.git('checkout', '--quiet', '-b', 'four', 'one')
+            repository.commit('four')
+            repository.git('merge', '--quiet', '--no-ff', '-m', 'all',
+                           'two', 'three', 'master')
+            repository.git(
+                'commit-graph', 'write', '--reachable', '--split=no-merge')
+            expected = self.parents(repository)
+            with CommitGraph.open(os.path.join('.git', 'objects')) as graph:
+                actual = self.graph_parents(graph, expected.keys())
+            self.assertEqual(actual, expected)
+
+    def test_walk_matches_log_order(self):
+        with Repository() as repository:
+            self.build(repository)
+            repository.git('commit-graph', 'write', '--reachable')
+            expected = repository.git('log', '--format=%H').split('\n')
+            with CommitGraph.open(os.path.join('.git', 'objects')) as graph:
+                tip = graph.find(repository.head())
+                actual = [
+                    graph.oid(position)
+                    for position, _
+                    in CommitGraphWalk(graph, [tip])
+                ]
+            self.assertEqual(actual, expected)
+
+
+class CommitGraphTreeTest(unittest.TestCase):
+
+    def describe(self, tree):
+        return {
+            branch.ref: (sorted(branch.names), sorted(branch.children.keys()))
+            for branch
+            in tree.branches
+        }
+
+    def build(self, repository):
+        repository.commit('initial')
+        repository.commit('release')
+        repository.branch('feature')
+        repository.commit('fix')
+        repository.checkout('feature')
+        repository.commit('feature')
+
+    def test_tree_is_read_from_commit_graph(self):
+        with Repository() as repository:
+            self.build(repository)
+            expected = self.describe(Git().tree(False))
+            repository.git('commit-graph', 'write', '--reachable')
+            with mock.patch.object(Git, '_log', side_effect=AssertionError):
+                with mock.patch.object(
+                        Git, '_cached_log', side_effect=AssertionError):
+                    self.assertEqual(
+                        self.describe(Git().tree(False)), expected)
+
+    def test_stale_commit_graph_falls_back(self):
+        with Repository() as repository:
+            self.build(repository)
+            repository.git('commit-graph', 'write', '--reachable')
+            repository.commit('another feature')
+            with mock.patch.object(
+                    Git, '_cached_log', wraps=Git()._cached_log) as log:
+                tree = Git().tree(False)
+            self.assertEqual(tree.head.ref, repository.head())
+            log.assert_called_once()
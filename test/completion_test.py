@@ -0,0 +1,51 @@
+import unittest
+
+from branch.commands import COMMANDS
+from branch.completion import Completion
+from branch.controller import Command
+from test.repository import Repository
+
+
+class CompletionTest(unittest.TestCase):
+
+    def test_completes_commands(self):
+        self.assertEqual(
+            Completion().complete(['']), ['daemon', 'pull', 'wipe'])
+        self.assertEqual(Completion().complete(['p']), ['pull'])
+
+    def test_completes_root_options(self):
+        self.assertEqual(
+            Completion().complete(['--c']), ['--commits'])
+        self.assertIn('-c', Completion().complete(['--bounded', '-']))
+
+    def test_completes_command_options(self):
+        self.assertEqual(
+            Completion().complete(['pull', '--']),
+            ['--help', '--jobs', '--replay', '--wipe'])
+        self.assertEqual(
+            Completion().complete(['wipe', '-']), ['--help', '-h'])
+
+    def test_completes_local_branches(self):
+        with Repository() as repository:
+            repository.commit('initial')
+            repository.branch('feature')
+            repository.branch('fix')
+            repository.git('pack-refs', '--all')
+            repository.branch('other')
+
+            commands = COMMANDS + [Command('show', '', takes_branch=True)]
+            self.assertEqual(
+                Completion(commands).complete(['show', 'f']),
+                ['feature', 'fix'])
+            self.assertEqual(
+                Completion(commands).complete(['show', '']),
+                ['feature', 'fix', 'master', 'other'])
+            self.assertEqual(Completion().complete(['f']), [])
+
+    def test_offers_no_branches_to_commands_without_arguments(self):
+        with Repository() as repository:
+            repository.commit('initial')
+            repository.branch('feature')
+
+            self.assertEqual(Completion().complete(['pull', 'f']), [])
+            self.assertEqual(Completion().complete(['wipe', '']), [])
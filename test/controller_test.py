@@ -0,0 +1,47 @@
+import io
+import unittest
+from unittest import mock
+
+from branch.commands import COMMANDS
+from branch.controller import Command
+from branch.controller import Controller
+
+
+class ControllerTest(unittest.TestCase):
+
+    def test_selects_root_flags_without_argparse(self):
+        with mock.patch.object(Controller, '_create_root_parser') as parser:
+            command, options = Controller().select(COMMANDS, ['-c', '--json'])
+
+        parser.assert_not_called()
+        self.assertIsNone(command)
+        self.assertTrue(options['commits'])
+        self.assertTrue(options['json'])
+        self.assertFalse(options['bounded'])
+
+    def test_matches_argparse_selection(self):
+        controller = Controller()
+        for arguments in [[], ['-c'], ['--bounded', '-t'], ['-W', '-T']]:
+            expected = controller.select(COMMANDS, arguments + ['-c', '-c'])
+            with mock.patch.object(
+                    Controller, '_select_flags', return_value=None):
+                self.assertEqual(
+                    controller.select(COMMANDS, arguments + ['-c']), expected)
+
+    def test_leaves_commands_to_argparse(self):
+        command, options = Controller().select(
+            COMMANDS, ['pull', '--jobs', '4'])
+        self.assertEqual(command, 'pull')
+        self.assertEqual(options['jobs'], 4)
+        self.assertFalse(options['commits'])
+
+        with mock.patch('sys.stderr', new=io.StringIO()):
+            with self.assertRaises(SystemExit):
+                Controller().select(COMMANDS, ['--unknown'])
+
+    def test_parses_branch_arguments(self):
+        commands = COMMANDS + [Command('show', '', takes_branch=True)]
+        command, options = Controller().select(commands, ['show', 'feature'])
+        self.assertEqual(command, 'show')
+        self.assertEqual(options['branch'], 'feature')
+        self.assertNotIn('branch', Controller().select(COMMANDS, ['pull'])[1])
@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+import unittest
+
+from branch.client import Client
+from branch.daemon import Daemon
+from branch.git import Git
+from branch.live import LiveTree
+from branch.watcher import REFS
+from branch.watcher import STAGE
+from branch.watcher import PollingWatcher
+from branch.watcher import Watcher
+from test.doubles import RecordingDisplay
+from test.repository import Repository
+
+
+class WatcherTest(unittest.TestCase):
+
+    def test_classifies_git_files(self):
+        git_dir = os.path.join('repository', '.git')
+        self.assertEqual(
+            Watcher.classify(git_dir, git_dir, os.path.join(git_dir, 'index')),
+            STAGE)
+        self.assertEqual(
+            Watcher.classify(git_dir, git_dir, os.path.join(git_dir, 'HEAD')),
+            REFS)
+        self.assertEqual(
+            Watcher.classify(
+                git_dir, git_dir, os.path.join(git_dir, 'refs', 'heads', 'a')),
+            REFS)
+        self.assertIsNone(Watcher.classify(
+            git_dir, git_dir, os.path.join(git_dir, 'index.lock')))
+        self.assertIsNone(Watcher.classify(
+            git_dir, git_dir, os.path.join(git_dir, 'ORIG_HEAD')))
+
+    def test_reports_ref_and_stage_changes(self):
+        with Repository() as repository:
+            repository.commit('initial')
+            git_dir = os.path.join(repository.path, '.git')
+            watchers = [Watcher.open, PollingWatcher]
+            for index, open_watcher in enumerate(watchers):
+                with open_watcher(git_dir, git_dir, 0.01) as watcher:
+                    self.assertEqual(watcher.wait(0), set())
+                    repository.branch('feature-{}'.format(index))
+                    self.assertIn(REFS, watcher.wait(2))
+
+                    with open('file', 'w') as file:
+                        file.write('change\n')
+                    repository.git('add', 'file')
+                    self.assertIn(STAGE, watcher.wait(2))
+                repository.git('reset', '--quiet')
+
+
+class LiveTreeTest(unittest.TestCase):
+
+    def test_rebuilds_only_when_tips_change(self):
+        with Repository() as repository:
+            repository.commit('initial')
+            live = LiveTree(Git())
+            tree = live.tree
+
+            self.assertFalse(live.refresh({REFS}))
+            self.assertIs(live.tree, tree)
+
+            repository.branch('feature')
+            self.assertTrue(live.refresh({REFS}))
+            self.assertIsNot(live.tree, tree)
+
+    def test_updates_stage_in_place(self):
+        with Repository() as repository:
+            repository.commit('initial')
+            live = LiveTree(Git())
+            tree = live.tree
+            self.assertFalse(tree.head.stage.staged)
+
+            with open('file', 'w') as file:
+                file.write('change\n')
+            repository.git('add', 'file')
+            self.assertTrue(live.refresh({STAGE}))
+            self.assertIs(live.tree, tree)
+            self.assertTrue(tree.head.stage.staged)
+            self.assertFalse(live.refresh({STAGE}))
+
+
+class ClientTest(unittest.TestCase):
+
+    def test_parses_tree_queries(self):
+        self.assertEqual(
+            Client.parse([]), {'command': 'render', 'commits': False})
+        self.assertEqual(
+            Client.parse(['-c', '--json']),
+            {'command': 'json', 'commits': True})
+        self.assertIsNone(Client.parse(['pull']))
+        self.assertIsNone(Client.parse(['--bounded']))
+
+    def test_finds_no_daemon(self):
+        with Repository() as repository:
+            repository.commit('initial')
+            self.assertIsNone(Client.find())
+
+
+class DaemonTest(unittest.TestCase):
+
+    def test_serves_refreshed_trees(self):
+        with Repository() as repository:
+            repository.commit('initial')
+            daemon = Daemon(Git(), RecordingDisplay())
+            thread = threading.Thread(target=daemon.serve)
+            thread.start()
+            try:
+                client = self._wait_for_client()
+                response = client.request(
+                    {'command': 'render', 'commits': False})
+                self.assertEqual(response['lines'], ['   [*master*]'])
+
+                repository.branch('feature')
+                self._wait_for(lambda: client.request(
+                    {'command': 'json', 'commits': False}
+                )['lines'][0].count('feature') > 0)
+            finally:
+                daemon.stop()
+                thread.join(5)
+
+            self.assertFalse(thread.is_alive())
+            self.assertIsNone(Client.find())
+
+    def _wait_for_client(self):
+        self._wait_for(lambda: Client.find() is not None)
+        client = Client.find()
+        self._wait_for(client.is_running)
+        return client
+
+    def _wait_for(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.02)
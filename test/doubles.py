@@ -0,0 +1,30 @@
+class RecordingDisplay:
+
+    def __init__(self):
+        self.messages = []
+        self.renderings = []
+
+    def message(self, *parts, type=None):
+        self.messages.append(parts[0].format(*parts[1:]))
+
+    def render(self, rendering):
+        self.renderings.append(list(rendering))
+
+    def redraw(self, rendering):
+        self.render(rendering)
+
+
+class StubCommitReader:
+
+    def __init__(self, commits):
+        self._commits = commits
+        self.reads = []
+
+    def read(self, commits):
+        self.reads.append(list(commits))
+        return {
+            commit: self._commits[commit]
+            for commit
+            in commits
+            if commit in self._commits
+        }
@@ -0,0 +1,284 @@
+import unittest
+from subprocess import CalledProcessError
+from unittest import mock
+
+from branch.controller import FixedController
+from branch.engine import Engine
+from branch.git import Git
+from test.doubles import RecordingDisplay
+from test.repository import Repository
+
+
+class WipeTest(unittest.TestCase):
+
+    def run_engine(self, command, options={}):
+        display = RecordingDisplay()
+        Engine(Git(), display, FixedController(command, options)).run()
+        return display
+
+    def branches(self, repository):
+        return repository.git(
+            'for-each-ref', '--format=%(refname:short)', 'refs/heads/'
+        ).split('\n')
+
+    def build(self, repository):
+        repository.commit('initial')
+        repository.branch('alias')
+        repository.branch('another')
+        repository.git('checkout', '--quiet', '-b', 'feature')
+        repository.commit('feature')
+        repository.branch('feature-alias')
+        repository.checkout('master')
+
+    def test_deletes_aliases_without_checkouts(self):
+        with Repository() as repository:
+            self.build(repository)
+            with mock.patch.object(Git, 'checkout', side_effect=AssertionError):
+                self.run_engine('wipe')
+            branches = self.branches(repository)
+            self.assertEqual(len(branches), 2)
+            self.assertIn('master', branches)
+            self.assertEqual(
+                len({'feature', 'feature-alias'}.intersection(branches)), 1)
+
+    def test_keeps_checked_out_alias(self):
+        with Repository() as repository:
+            self.build(repository)
+            repository.checkout('feature-alias')
+            self.run_engine('wipe')
+            self.assertEqual(
+                self.branches(repository), ['feature-alias', 'master'])
+            self.assertEqual(
+                repository.git('symbolic-ref', '--short', 'HEAD'),
+                'feature-alias')
+
+    def test_removes_branch_configuration(self):
+        with Repository() as repository:
+            self.build(repository)
+            repository.git('config', 'branch.alias.remote', 'origin')
+            self.run_engine('wipe')
+            with self.assertRaises(CalledProcessError):
+                repository.git('config', 'branch.alias.remote')
+
+
+class ScriptedWatcher:
+
+    def __init__(self, steps):
+        self._steps = list(steps)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def wait(self, timeout=None):
+        if len(self._steps) == 0:
+            raise KeyboardInterrupt()
+        step, changes = self._steps.pop(0)
+        step()
+        return changes
+
+
+class WatchTest(unittest.TestCase):
+
+    def run_engine(self, steps, options={}):
+        display = RecordingDisplay()
+        with mock.patch(
+                'branch.watcher.Watcher.open',
+                return_value=ScriptedWatcher(steps)):
+            Engine(
+                Git(), display,
+                FixedController(None, dict(options, watch=True))
+            ).run()
+        return display.renderings
+
+    def test_redraws_only_changed_trees(self):
+        with Repository() as repository:
+            repository.commit('initial')
+            renderings = self.run_engine([
+                (lambda: None, {'refs'}),
+                (lambda: repository.branch('feature'), {'refs'}),
+                (lambda: repository.commit('second'), {'refs', 'stage'})
+            ], {'commits': True})
+
+        self.assertEqual(len(renderings), 3)
+        self.assertEqual(renderings[0][0], '   [*master*]')
+        self.assertEqual(renderings[1][0], '   [*master*][ feature ]')
+        self.assertEqual(renderings[2][0], '   .-> [*master*]')
+
+    def test_redraws_stage_changes(self):
+        with Repository() as repository:
+            repository.commit('initial')
+
+            def stage():
+                with open('file', 'w') as file:
+                    file.write('change\n')
+                repository.git('add', 'file')
+
+            renderings = self.run_engine([
+                (stage, {'stage'}),
+                (lambda: None, {'stage'})
+            ])
+
+        self.assertEqual(len(renderings), 2)
+        self.assertIn('     (staged changes) ', renderings[1])
+
+
+class PullTest(unittest.TestCase):
+
+    def run_engine(self, options={}):
+        display = RecordingDisplay()
+        Engine(Git(), display, FixedController('pull', options)).run()
+        return display.messages
+
+    def build(self, origin, repository):
+        origin.commit('initial')
+        repository.git('pull', '--quiet')
+        for name, parent in (('one', 'master'), ('two', 'one'),
+                             ('three', 'master')):
+            repository.git('checkout', '--quiet', '-b', name, parent)
+            repository.commit(name)
+        repository.checkout('master')
+
+    def rebased(self, messages):
+        return [
+            message
+            for message
+            in messages
+            if message.startswith("  Rebasing '")
+            or message.startswith("  Rebased '")
+        ]
+
+    def is_ancestor(self, repository, ancestor, descendant):
+        try:
+            repository.git('merge-base', '--is-ancestor', ancestor, descendant)
+        except CalledProcessError:
+            return False
+        return True
+
+    def test_skips_branches_when_nothing_moved(self):
+        with Repository() as origin:
+            with Repository(origin) as repository:
+                self.build(origin, repository)
+                for options in [{}, {'jobs': 2}]:
+                    messages = self.run_engine(options)
+                    self.assertEqual(self.rebased(messages), [])
+                    self.assertIn(
+                        'Skipping 3 branches already based on their parents.',
+                        messages)
+
+    def test_rebases_descendants_of_moved_branches(self):
+        with Repository() as origin:
+            with Repository(origin) as repository:
+                self.build(origin, repository)
+                for options in [{}, {'jobs': 2}]:
+                    origin.commit('upstream', file=str(options))
+                    messages = self.run_engine(options)
+                    self.assertEqual(len(self.rebased(messages)), 2)
+                    for parent, child in (('origin/master', 'one'),
+                                          ('one', 'two'),
+                                          ('origin/master', 'three')):
+                        self.assertTrue(
+                            self.is_ancestor(repository, parent, child))
+
+    def test_skips_branches_already_based_on_the_new_tip(self):
+        with Repository() as origin:
+            with Repository(origin) as repository:
+                self.build(origin, repository)
+                tip = origin.commit('upstream')
+                repository.git('fetch', '--quiet', 'origin', tip)
+                repository.git('branch', '--force', 'three', tip)
+
+                messages = self.run_engine()
+                self.assertEqual(
+                    self.rebased(messages),
+                    ["  Rebasing 'one', 'two' over 'master' ..."])
+                self.assertIn(
+                    'Skipping 1 branches already based on their parents.',
+                    messages)
+
+    def test_parallel_pull_wipes_with_the_rebased_tips(self):
+        with Repository() as origin:
+            with Repository(origin) as repository:
+                self.build(origin, repository)
+                repository.git('branch', 'three-alias', 'three')
+                origin.commit('upstream')
+
+                self.run_engine({'jobs': 2, 'wipe': True})
+                branches = repository.git(
+                    'for-each-ref', '--format=%(refname:short)', 'refs/heads/'
+                ).split('\n')
+                self.assertIn('three', branches)
+                self.assertIn('three-alias', branches)
+                self.assertTrue(any(
+                    self.is_ancestor(repository, 'origin/master', name)
+                    for name
+                    in ['three', 'three-alias']))
+
+    def test_fast_forwards_root_without_checking_it_out(self):
+        with Repository() as origin:
+            with Repository(origin) as repository:
+                self.build(origin, repository)
+                repository.checkout('two')
+                tip = origin.commit('upstream')
+                before = repository.git('reflog', '--format=%gs').split('\n')
+
+                self.run_engine()
+                after = repository.git('reflog', '--format=%gs').split('\n')
+                self.assertEqual(repository.git('rev-parse', 'master'), tip)
+                self.assertFalse(any(
+                    entry.startswith('checkout:')
+                    for entry
+                    in after[:len(after) - len(before)]))
+                self.assertTrue(self.is_ancestor(repository, 'master', 'two'))
+
+    def test_fast_forwards_checked_out_root(self):
+        with Repository() as origin:
+            with Repository(origin) as repository:
+                self.build(origin, repository)
+                tip = origin.commit('upstream')
+
+                self.run_engine()
+                self.assertEqual(repository.git('rev-parse', 'master'), tip)
+                with open('upstream', 'r') as file:
+                    self.assertEqual(file.read(), 'upstream\n')
+
+    def test_rebases_diverged_root(self):
+        with Repository() as origin:
+            with Repository(origin) as repository:
+                origin.commit('initial')
+                repository.git('pull', '--quiet')
+                repository.commit('local')
+                tip = origin.commit('upstream')
+
+                messages = self.run_engine()
+                self.assertTrue(self.is_ancestor(repository, tip, 'master'))
+                self.assertIn(
+                    "'master' has diverged from its upstream, rebasing it ...",
+                    messages)
+
+    def test_rebases_stacks_in_one_pass(self):
+        with Repository() as origin:
+            with Repository(origin) as repository:
+                self.build(origin, repository)
+                repository.git('checkout', '--quiet', '-b', 'four', 'two')
+                repository.commit('four')
+                repository.checkout('two')
+                repository.git('checkout', '--quiet', '-b', 'five')
+                repository.commit('five')
+                repository.checkout('three')
+                origin.commit('upstream')
+
+                messages = self.run_engine()
+                self.assertEqual(sorted(self.rebased(messages)), [
+                    "  Rebasing 'five' over 'two' ...",
+                    "  Rebasing 'four' over 'two' ...",
+                    "  Rebasing 'one', 'two' over 'master' ...",
+                    "  Rebasing 'three' over 'master' ..."
+                ])
+                for parent, child in (('origin/master', 'one'),
+                                      ('one', 'two'), ('two', 'four'),
+                                      ('two', 'five')):
+                    self.assertTrue(
+                        self.is_ancestor(repository, parent, child))
@@ -1,10 +1,20 @@
+import os
+import sys
+import tempfile
 import unittest
 from branch.commit import Commit
+from branch.git import CommitCache
+from branch.git import CommitReader
 from branch.git import Git
+from branch.git import GitInteractor
 from branch.git import LogEntry
+from branch.git import NO_BRANCHES
 from branch.git import TreeBuilder
 from branch.git import TreeData
 from branch.git import TreeReader
+from branch.graph import GraphStore
+from test.doubles import StubCommitReader
+from test.repository import Repository
 
 
 class LogEntryTest(unittest.TestCase):
@@ -52,6 +62,160 @@ class LogEntryTest(unittest.TestCase):
         self.assertEntry(
             entry, 'a85b5b2', ['9abcb6b'], ['master', 'branch1'], 'message')
 
+    def test_from_fields(self):
+        entry = LogEntry.from_fields(
+            'a85b5b2', '9abcb6b 27d6e22', 'HEAD -> master, tag: v1')
+        self.assertEntry(
+            entry, 'a85b5b2', ['9abcb6b', '27d6e22'], ['master'], '')
+
+    def test_parse_fields(self):
+        self.assertEqual(
+            LogEntry.parse_fields('a85b5b2', '9abcb6b', 'HEAD -> master'),
+            ('a85b5b2', ['9abcb6b'], {'master'}))
+        commit, parents, branches = LogEntry.parse_fields('9abcb6b', '', '')
+        self.assertEqual(parents, [])
+        self.assertIs(branches, NO_BRANCHES)
+
+    def test_from_fields_decodes_refs(self):
+        raw = 'Café'.encode('utf-8').decode('latin-1')
+        entry = LogEntry.from_fields('a85b5b2', '', raw)
+        self.assertEntry(entry, 'a85b5b2', [], ['Café'], '')
+
+
+class CommitReaderTest(unittest.TestCase):
+
+    def test_reads_only_requested_subjects(self):
+        with Repository() as repository:
+            repository.commit('first')
+            first = repository.head()
+            repository.commit('Café [x] ]')
+            second = repository.head()
+
+            commits = CommitReader().read([second])
+            self.assertEqual(list(commits.keys()), [second])
+            self.assertNotIn(first, commits)
+            self.assertEqual(commits[second].message, 'Café [x] ]')
+            self.assertEqual(CommitReader().read([]), {})
+
+    def test_tree_reads_subjects_of_rendered_commits(self):
+        with Repository() as repository:
+            repository.commit('first')
+            repository.commit('second')
+            repository.git('commit-graph', 'write', '--reachable')
+
+            tree = Git().tree(True)
+            self.assertEqual(
+                [commit.message for commit in tree.root.commits], ['second'])
+
+
+class CommitCacheTest(unittest.TestCase):
+
+    def test_reads_only_missing_commits(self):
+        reader = StubCommitReader({
+            'a': Commit('a', 'first'),
+            'b': Commit('b', 'second')
+        })
+        cache = CommitCache(reader)
+
+        self.assertEqual(list(cache.read(['a']).keys()), ['a'])
+        commits = cache.read(['a', 'b'])
+        self.assertEqual(commits['b'].message, 'second')
+        cache.read(['b'])
+        cache.read(['a'])
+        self.assertEqual(reader.reads, [['a'], ['b'], [], ['a']])
+
+
+class StageTest(unittest.TestCase):
+
+    def flags(self, stage):
+        return stage.staged, stage.unstaged, stage.untracked
+
+    def write(self, repository, file, content):
+        with open(os.path.join(repository.path, file), 'w') as stream:
+            stream.write(content)
+
+    def test_clean_working_tree(self):
+        with Repository() as repository:
+            repository.commit('initial')
+            self.assertEqual(
+                self.flags(Git().stage()), (False, False, False))
+
+    def test_detects_each_change_separately(self):
+        with Repository() as repository:
+            repository.commit('initial')
+            self.write(repository, 'initial', 'changed\n')
+            self.assertEqual(self.flags(Git().stage()), (False, True, False))
+
+            repository.git('add', 'initial')
+            self.assertEqual(self.flags(Git().stage()), (True, False, False))
+
+            self.write(repository, 'new', 'new\n')
+            self.assertEqual(self.flags(Git().stage()), (True, False, True))
+            self.assertEqual(
+                self.flags(Git().stage(untracked=False)), (True, False, False))
+
+    def test_untracked_files_outside_of_the_working_directory(self):
+        with Repository() as repository:
+            repository.commit('initial')
+            os.mkdir('directory')
+            repository.commit('nested', os.path.join('directory', 'file'))
+            self.write(repository, 'new', 'new\n')
+            path = os.path.join(repository.path, 'directory')
+            self.assertEqual(
+                self.flags(Git(path).stage()), (False, False, True))
+
+    def test_ignored_files(self):
+        with Repository() as repository:
+            repository.commit('*.log', '.gitignore')
+            self.write(repository, 'output.log', 'ignored\n')
+            self.assertEqual(
+                self.flags(Git().stage()), (False, False, False))
+
+    def test_unborn_branch(self):
+        with Repository() as repository:
+            self.write(repository, 'new', 'new\n')
+            repository.git('add', 'new')
+            self.assertEqual(self.flags(Git().stage()), (True, False, False))
+
+
+class GitInteractorTest(unittest.TestCase):
+
+    def read(self, output, width, adapter=lambda *fields: fields):
+        with tempfile.NamedTemporaryFile() as file:
+            file.write(output)
+            file.flush()
+            command = ['cat', file.name]
+            with GitInteractor(adapter, command, width=width) as log:
+                return list(log)
+
+    def test_groups_fields_into_records(self):
+        records = self.read(b'a\0b\0\0c\0d\0e\0', 3)
+        self.assertEqual(records, [('a', 'b', ''), ('c', 'd', 'e')])
+
+    def test_records_spanning_chunks(self):
+        output = b''.join(
+            b'%040d\0%040d\0\0subject %d\0' % (i, i + 1, i)
+            for i in range(20000))
+        records = self.read(output, 4)
+        self.assertEqual(len(records), 20000)
+        self.assertEqual(records[12345], (
+            '{:040d}'.format(12345), '{:040d}'.format(12346),
+            '', 'subject 12345'))
+
+    def test_stopping_early_reaps_the_process(self):
+        script = 'import sys\nwhile True: sys.stdout.buffer.write(b"a\\0" * 1000)'
+        log = GitInteractor(lambda x: x, [sys.executable, '-c', script])
+        with log:
+            self.assertEqual(next(log), 'a')
+        self.assertIsNotNone(log._process.returncode)
+
+    def test_adapter_errors_reach_the_reader(self):
+        def adapter(field):
+            raise ValueError(field)
+
+        with self.assertRaises(ValueError):
+            self.read(b'a\0', 1, adapter)
+
 
 class TestTreeReader(unittest.TestCase):
 
@@ -60,15 +224,21 @@ class TestTreeReader(unittest.TestCase):
         self.assertEqual(data.branches, branches)
         self.assertEqual(data.head, head)
         self.assertEqual(data.root, root)
-        self.assertEqual(data._tree.keys(), tree.keys())
+        children = {
+            key: data.children(key)
+            for key
+            in data.graph.keys()
+            if len(data.children(key)) > 0
+        }
+        self.assertEqual(children.keys(), tree.keys())
         for key in tree.keys():
-            self.assertEqual(set(data._tree[key]), set(tree[key]))
+            self.assertEqual(set(children[key]), set(tree[key]))
 
     def log_entry(self, hash, parents, message, branches=[]):
-        return LogEntry(hash, parents, branches[:], message)
+        return hash, parents, branches[:]
 
     def test_single_branch_and_single_commit(self):
-        data = TreeReader(False).read('210d73e', ['master'], [
+        data = TreeReader().read('210d73e', ['master'], [
             self.log_entry('210d73e', [], 'Commit message', branches=['master'])
         ])
 
@@ -82,7 +252,7 @@ class TestTreeReader(unittest.TestCase):
             tree={})
 
     def test_multple_branches_with_multiple_commits(self):
-        data = TreeReader(False).read('d43991b', ['fixes', 'master', 'feature'], [
+        data = TreeReader().read('d43991b', ['fixes', 'master', 'feature'], [
             self.log_entry(
                 'd43991b', ['e5b122a'], 'Fixed a third bug',
                 branches=['fixes']),
@@ -120,7 +290,7 @@ class TestTreeReader(unittest.TestCase):
             })
 
     def test_unnamed_branch_points(self):
-        data = TreeReader(False).read('b7c3625', ['fixes', 'master', 'feature'], [
+        data = TreeReader().read('b7c3625', ['fixes', 'master', 'feature'], [
             self.log_entry('de5005c', ['9d98707'], 'Fixed a third bug',
                            branches=['fixes']),
             self.log_entry('9d98707', ['e6770b0'], 'Fixed another bug'),
@@ -151,7 +321,7 @@ class TestTreeReader(unittest.TestCase):
             })
 
     def test_multiname_branches(self):
-        data = TreeReader(False).read('e5ff570', ['fixes', 'master', 'feature'], [
+        data = TreeReader().read('e5ff570', ['fixes', 'master', 'feature'], [
             self.log_entry('e5ff570', ['e85997d'], 'Fixed a bug in feature A',
                            branches=['feature']),
             self.log_entry('e85997d', ['c3624d3'], 'Fixed a third bug',
@@ -172,7 +342,7 @@ class TestTreeReader(unittest.TestCase):
             })
 
     def test_remote_branches(self):
-        data = TreeReader(False).read('e85997d', ['fixes', 'master', 'feature'], [
+        data = TreeReader().read('e85997d', ['fixes', 'master', 'feature'], [
             self.log_entry('e5ff570', ['e85997d'], 'Fixed a bug in feature A',
                            branches=['feature']),
             self.log_entry('e4f444b', ['e85997d'], 'Fixed a third bug',
@@ -197,7 +367,7 @@ class TestTreeReader(unittest.TestCase):
             })
 
     def test_merges(self):
-        data = TreeReader(False).read('6b261a7', ['fixes', 'master', 'feature'], [
+        data = TreeReader().read('6b261a7', ['fixes', 'master', 'feature'], [
             self.log_entry('6b261a7', ['541b298'], 'Fixed the CLI',
                            branches=['fixes']),
             self.log_entry('541b298', ['76094a4', '0ef17ac'], 'Merge all'),
@@ -228,7 +398,7 @@ class TestTreeReader(unittest.TestCase):
             })
 
     def test_detached_head_above_master(self):
-        data = TreeReader(False).read('541b298', ['master', 'branch'], [
+        data = TreeReader().read('541b298', ['master', 'branch'], [
             self.log_entry('6b261a7', ['541b298'], 'Fixed the CLI', branches=['branch']),
             self.log_entry('541b298', ['e85997d'], 'Fixed the API'),
             self.log_entry('e85997d', ['c3624d3'], 'Major release', branches=['master'])
@@ -249,7 +419,7 @@ class TestTreeReader(unittest.TestCase):
             })
 
     def test_detached_head_below_master(self):
-        data = TreeReader(False).read('e85997d', ['master', 'branch'], [
+        data = TreeReader().read('e85997d', ['master', 'branch'], [
             self.log_entry('6b261a7', ['541b298'], 'Fixed the CLI', branches=['branch']),
             self.log_entry('541b298', ['e85997d'], 'Fixed the API', branches=['master']),
             self.log_entry('e85997d', ['c3624d3'], 'Major release')
@@ -270,7 +440,7 @@ class TestTreeReader(unittest.TestCase):
             })
 
     def test_ambiguous_head(self):
-        data = TreeReader(False).read('541b298', ['master', 'HEAD'], [
+        data = TreeReader().read('541b298', ['master', 'HEAD'], [
             self.log_entry('6b261a7', ['541b298'], 'Fixed the CLI', branches=['HEAD']),
             self.log_entry('541b298', ['e85997d'], 'Fixed the API'),
             self.log_entry('e85997d', ['c3624d3'], 'Major release', branches=['master'])
@@ -290,6 +460,34 @@ class TestTreeReader(unittest.TestCase):
                 '541b298': ['6b261a7']
             })
 
+    def test_long_linear_history(self):
+        log = [self.log_entry('c100000', ['c99999'], 'Tip', branches=['fixes'])]
+        log.extend(
+            self.log_entry('c{}'.format(i), ['c{}'.format(i - 1)], 'Change')
+            for i in range(99999, 0, -1))
+        log.append(self.log_entry('c0', ['base'], 'Release', branches=['master']))
+
+        data = TreeReader().read('c100000', ['fixes', 'master'], log)
+
+        self.assertEqual(data.root, 'c0')
+        self.assertEqual(len(data.graph), 100002)
+        self.assertEqual(data.children('c0'), ['c1'])
+
+    def test_merge_heavy_history(self):
+        log = [self.log_entry('m0', ['a0', 'b0'], 'Merge', branches=['fixes'])]
+        for i in range(1000):
+            parents = ['a{}'.format(i + 1), 'b{}'.format(i + 1)]
+            log.append(self.log_entry('a{}'.format(i), parents, 'Left'))
+            log.append(self.log_entry('b{}'.format(i), parents, 'Right'))
+        log.append(self.log_entry('a1000', ['base'], 'Left'))
+        log.append(self.log_entry('b1000', ['base'], 'Right'))
+        log.append(self.log_entry('base', ['x'], 'Release', branches=['master']))
+
+        data = TreeReader().read('m0', ['fixes', 'master'], log)
+
+        self.assertEqual(data.root, 'base')
+        self.assertEqual(data.children('base'), ['a1000', 'b1000'])
+
 
 class TestTreeBuilder(unittest.TestCase):
 
@@ -340,7 +538,12 @@ class TestTreeBuilder(unittest.TestCase):
 
     def tree_data(self, tree={}, branches={},
                   head=None, root=None, commits={}):
-        return TreeData(tree, branches, commits, head, root)
+        graph = GraphStore()
+        for parent, children in tree.items():
+            for child in children:
+                graph.link(parent, child)
+        return TreeData(
+            graph, branches, StubCommitReader(commits), head, root)
 
     def commits(self, commits):
         return {
@@ -369,6 +572,23 @@ class TestTreeBuilder(unittest.TestCase):
             ])
         ])
 
+    def test_reads_commits_only_when_requested(self):
+        data = self.tree_data(
+            head='b299199',
+            root='b299199',
+            tree={'2248903': ['b299199']},
+            branches={'b299199': ['master']},
+            commits=self.commits({
+                '2248903': 'Commit message',
+                'b299199': 'Some message'
+            }))
+
+        TreeBuilder.build_tree(data, False)
+        self.assertEqual(data._commits.reads, [])
+
+        TreeBuilder.build_tree(data, True)
+        self.assertEqual(data._commits.reads, [['b299199']])
+
     def test_multple_branches_with_multiple_commits(self):
         data = self.tree_data(
             head='d43991b',
@@ -653,3 +873,35 @@ class TestTreeBuilder(unittest.TestCase):
             'e85997d': ['e5ff570'],
             'e5ff570': ['6b261a7']
         })
+
+    def test_deep_stack_of_branches(self):
+        tree = {'b{}'.format(i): ['b{}'.format(i + 1)] for i in range(10000)}
+        data = self.tree_data(
+            head='b10000',
+            root='b0',
+            tree=tree,
+            branches={'b{}'.format(i): ['s{}'.format(i)] for i in range(10001)},
+            commits=self.commits({}))
+
+        tree = TreeBuilder.build_tree(data, False)
+
+        self.assertNumberOfBranches(tree, 10001)
+        self.assertEqual(list(tree['b9999'].children.keys()), ['b10000'])
+
+    def test_long_branch(self):
+        tree = {'c{}'.format(i): ['c{}'.format(i + 1)] for i in range(100000)}
+        data = self.tree_data(
+            head='c100000',
+            root='c0',
+            tree=tree,
+            branches={'c100000': ['feature'], 'c0': ['master']},
+            commits=self.commits({
+                'c{}'.format(i): 'Change' for i in range(100001)
+            }))
+
+        tree = TreeBuilder.build_tree(data, True)
+
+        commits = tree['c100000'].commits
+        self.assertEqual(len(commits), 100000)
+        self.assertEqual(commits[0].id, 'c100000')
+        self.assertEqual(commits[-1].id, 'c1')
@@ -0,0 +1,85 @@
+import hashlib
+import tracemalloc
+import unittest
+from branch.graph import GraphStore
+
+
+class GraphStoreTest(unittest.TestCase):
+
+    def test_interns_each_commit_once(self):
+        graph = GraphStore()
+        first = graph.add('b', ['a'])
+        second = graph.add('c', ['a', 'b'])
+        self.assertEqual(len(graph), 3)
+        self.assertEqual(graph.id('b'), first)
+        self.assertEqual(graph.key(second), 'c')
+        self.assertIsNone(graph.id('x'))
+
+    def test_parents_keep_their_order(self):
+        graph = GraphStore()
+        merge = graph.add('m', ['b', 'a'])
+        parents = [graph.key(id) for id in graph.parents(merge)]
+        self.assertEqual(parents, ['b', 'a'])
+        self.assertEqual(list(graph.parents(graph.id('a'))), [])
+
+    def test_children_keep_the_order_they_were_added_in(self):
+        graph = GraphStore()
+        graph.add('c', ['a'])
+        graph.add('b', ['a'])
+        graph.add('a', ['root'])
+        children = [graph.key(id) for id in graph.children(graph.id('a'))]
+        self.assertEqual(children, ['c', 'b'])
+        self.assertEqual(list(graph.children(graph.id('c'))), [])
+
+    def test_children_are_reindexed_after_new_edges(self):
+        graph = GraphStore()
+        graph.add('b', ['a'])
+        self.assertEqual(len(graph.children(graph.id('a'))), 1)
+        graph.link('a', 'c')
+        children = [graph.key(id) for id in graph.children(graph.id('a'))]
+        self.assertEqual(children, ['b', 'c'])
+
+    def test_keeps_object_ids_and_other_keys_apart(self):
+        graph = GraphStore()
+        commit = hashlib.sha1(b'commit').hexdigest()
+        merge = graph.add(commit, ['a', 'z' * 40])
+        self.assertEqual(graph.key(merge), commit)
+        self.assertEqual(graph.keys(), [commit, 'a', 'z' * 40])
+        self.assertNotIn(hashlib.sha1(b'other').hexdigest(), graph)
+
+    def test_takes_raw_object_ids(self):
+        graph = GraphStore()
+        commit, parent = hashlib.sha1(b'commit'), hashlib.sha1(b'parent')
+        id = graph.add(commit.digest(), [parent.hexdigest()])
+        self.assertEqual(graph.key(id), commit.hexdigest())
+        self.assertEqual(graph.id(parent.digest()), graph.parents(id)[0])
+        self.assertEqual(graph.key(graph.intern(b'short')), b'short'.hex())
+
+    def test_takes_less_memory_than_a_dict_of_children(self):
+        commits = [
+            hashlib.sha1(str(i).encode()).hexdigest() for i in range(20000)
+        ]
+
+        def build_dict():
+            tree = {}
+            for parent, child in zip(commits[1:], commits):
+                tree[parent] = tree.get(parent, []) + [child]
+            return tree
+
+        def build_store():
+            graph = GraphStore()
+            for commit, parent in zip(commits, commits[1:]):
+                graph.add(commit, [parent])
+            graph.children(0)
+            return graph
+
+        self.assertLess(
+            self.measure_peak(build_store), self.measure_peak(build_dict))
+
+    def measure_peak(self, build):
+        tracemalloc.start()
+        try:
+            build()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
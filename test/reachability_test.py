@@ -0,0 +1,53 @@
+import unittest
+from branch.graph import GraphStore
+from branch.reachability import ReachabilityIndex
+
+
+class ReachabilityIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = GraphStore()
+        self.index = ReachabilityIndex(self.graph)
+
+    def add(self, commit, parents):
+        self.index.add(self.graph.add(commit, parents))
+
+    def mark(self, commit):
+        self.index.mark(self.graph.id(commit))
+
+    def reaches_all(self, commit):
+        return self.index.reaches_all(self.graph.id(commit))
+
+    def test_nothing_marked(self):
+        self.add('b', ['a'])
+        self.assertTrue(self.reaches_all('b'))
+        self.assertTrue(self.reaches_all('a'))
+
+    def test_marked_commit_reaches_itself(self):
+        self.add('b', ['a'])
+        self.mark('b')
+        self.assertTrue(self.reaches_all('b'))
+        self.assertTrue(self.reaches_all('a'))
+
+    def test_sibling_does_not_reach(self):
+        self.add('c', ['a'])
+        self.mark('c')
+        self.add('b', ['a'])
+        self.mark('b')
+        self.assertFalse(self.reaches_all('b'))
+        self.assertFalse(self.reaches_all('c'))
+        self.assertTrue(self.reaches_all('a'))
+
+    def test_parents_added_out_of_order(self):
+        self.add('b', ['a'])
+        self.add('d', ['c'])
+        self.mark('d')
+        self.mark('b')
+        self.assertFalse(self.reaches_all('a'))
+        self.add('c', ['a'])
+        self.assertTrue(self.reaches_all('a'))
+
+    def test_unknown_commit(self):
+        self.add('b', ['a'])
+        self.mark('b')
+        self.assertFalse(self.reaches_all('x'))
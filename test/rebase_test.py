@@ -0,0 +1,96 @@
+import unittest
+
+from branch.git import Git
+from branch.plan import RebasePlan
+from branch.rebase import ParallelRebase
+from test.doubles import RecordingDisplay
+from test.repository import Repository
+
+
+class ParallelRebaseTest(unittest.TestCase):
+
+    def build(self, repository):
+        repository.commit('initial')
+        for name, parent in (('one', 'master'), ('two', 'one'),
+                             ('three', 'master'), ('four', 'three'),
+                             ('five', 'three')):
+            repository.checkout(parent)
+            repository.git('checkout', '--quiet', '-b', name)
+            repository.commit(name)
+        repository.checkout('master')
+
+    def is_ancestor(self, repository, ancestor, descendant):
+        try:
+            repository.git('merge-base', '--is-ancestor', ancestor, descendant)
+        except Exception:
+            return False
+        return True
+
+    def test_rebases_every_branch_over_its_parent(self):
+        with Repository() as repository:
+            self.build(repository)
+            tree = Git().tree(False)
+            repository.commit('release')
+
+            display = RecordingDisplay()
+            ParallelRebase(Git(), display, 3).run(tree.root)
+
+            for parent, child in (('master', 'one'), ('one', 'two'),
+                                  ('master', 'three'), ('three', 'four'),
+                                  ('three', 'five')):
+                self.assertTrue(self.is_ancestor(repository, parent, child))
+            self.assertEqual(len(display.messages), 6)
+            self.assertEqual(
+                len(repository.git('worktree', 'list').split('\n')), 1)
+
+    def test_conflicts_skip_child_branches(self):
+        with Repository() as repository:
+            self.build(repository)
+            tree = Git().tree(False)
+            repository.commit('conflict', file='one')
+
+            display = RecordingDisplay()
+            before = repository.git('rev-parse', 'two')
+            ParallelRebase(Git(), display, 2).run(tree.root)
+
+            self.assertFalse(self.is_ancestor(repository, 'master', 'one'))
+            self.assertEqual(repository.git('rev-parse', 'two'), before)
+            self.assertTrue(self.is_ancestor(repository, 'master', 'three'))
+            self.assertTrue(self.is_ancestor(repository, 'three', 'five'))
+
+    def test_rebases_stacks_together(self):
+        with Repository() as repository:
+            self.build(repository)
+            tree = Git().tree(False)
+            repository.commit('release')
+            repository.checkout('four')
+
+            display = RecordingDisplay()
+            plan = RebasePlan(Git(), tree.root)
+            ParallelRebase(Git(), display, 2, plan).run(tree.root)
+
+            self.assertIn("  Rebased 'one', 'two' over 'master'.",
+                          display.messages)
+            self.assertIn("  Rebased 'three' over 'master'.", display.messages)
+            self.assertIn("  Rebased 'four' over 'three'.", display.messages)
+            for parent, child in (('master', 'one'), ('one', 'two'),
+                                  ('three', 'four'), ('three', 'five')):
+                self.assertTrue(self.is_ancestor(repository, parent, child))
+            self.assertEqual(
+                repository.git('symbolic-ref', '--short', 'HEAD'), 'four')
+
+    def test_stacks_end_at_the_checked_out_branch(self):
+        with Repository() as repository:
+            self.build(repository)
+            tree = Git().tree(False)
+            repository.commit('release')
+            repository.checkout('one')
+
+            display = RecordingDisplay()
+            plan = RebasePlan(Git(), tree.root)
+            ParallelRebase(Git(), display, 2, plan).run(tree.root)
+
+            self.assertIn("  Rebased 'one' over 'master'.", display.messages)
+            self.assertIn("  Rebased 'two' over 'one'.", display.messages)
+            self.assertTrue(self.is_ancestor(repository, 'master', 'one'))
+            self.assertTrue(self.is_ancestor(repository, 'one', 'two'))
@@ -0,0 +1,99 @@
+import os
+import unittest
+
+from branch.git import Git
+from branch.refs import RefStore
+from test.repository import Repository
+
+
+class RefStoreTest(unittest.TestCase):
+
+    def build(self, repository):
+        repository.commit('initial')
+        repository.branch('feature')
+        repository.commit('release')
+        repository.git('tag', '--annotate', '--message', 'v1', 'v1')
+        repository.git('update-ref', 'refs/remotes/origin/master', 'HEAD')
+        repository.git(
+            'symbolic-ref', 'refs/remotes/origin/HEAD',
+            'refs/remotes/origin/master')
+
+    def for_each_ref(self, repository):
+        rows = repository.git(
+            'for-each-ref', '--format=%(refname) %(objectname)').split('\n')
+        return dict(row.split(' ') for row in rows)
+
+    def test_outside_of_repository(self):
+        with Repository():
+            os.mkdir('nested')
+            os.rename('.git', os.path.join('nested', 'moved'))
+            self.assertIsNone(RefStore.open())
+
+    def test_loose_refs(self):
+        with Repository() as repository:
+            self.build(repository)
+            store = RefStore.open()
+            self.assertEqual(store.refs(), self.for_each_ref(repository))
+            self.assertEqual(store.head(), repository.head())
+            self.assertEqual(store.head_ref(), 'refs/heads/master')
+
+    def test_packed_refs(self):
+        with Repository() as repository:
+            self.build(repository)
+            repository.git('pack-refs', '--all')
+            repository.branch('loose', 'master~1')
+            store = RefStore.open()
+            self.assertEqual(store.refs(), self.for_each_ref(repository))
+            self.assertEqual(
+                store.peeled('refs/tags/v1'),
+                repository.git('rev-parse', 'v1^{commit}'))
+
+    def test_branches(self):
+        with Repository() as repository:
+            self.build(repository)
+            store = RefStore.open()
+            self.assertEqual(store.branches(), ['feature', 'master'])
+            self.assertEqual(store.remote_branches(), ['origin/master'])
+
+    def test_detached_head(self):
+        with Repository() as repository:
+            self.build(repository)
+            repository.checkout('master~1')
+            store = RefStore.open()
+            self.assertIsNone(store.head_ref())
+            self.assertEqual(store.head(), repository.head())
+
+    def test_worktree(self):
+        with Repository() as repository:
+            self.build(repository)
+            repository.git('worktree', 'add', '--quiet', 'other', 'feature')
+            os.chdir('other')
+            store = RefStore.open()
+            self.assertEqual(store.head_ref(), 'refs/heads/feature')
+            self.assertEqual(store.refs(), self.for_each_ref(repository))
+            self.assertEqual(
+                os.path.realpath(store.common_dir),
+                os.path.realpath(os.path.join(repository.path, '.git')))
+
+    def test_reload(self):
+        with Repository() as repository:
+            self.build(repository)
+            store = RefStore.open()
+            self.assertEqual(store.branches(), ['feature', 'master'])
+            repository.branch('fixes')
+            self.assertEqual(store.branches(), ['feature', 'master'])
+            store.reload()
+            self.assertEqual(store.branches(), ['feature', 'fixes', 'master'])
+
+
+class GitRefsTest(unittest.TestCase):
+
+    def test_current_branch(self):
+        with Repository() as repository:
+            repository.commit('initial')
+            repository.git('checkout', '--quiet', '-b', 'feature')
+            self.assertEqual(Git().branch(), 'feature')
+            repository.checkout('HEAD~0^{commit}')
+            self.assertEqual(
+                Git().branch(),
+                '(HEAD detached at {})'.format(repository.head()[:7]))
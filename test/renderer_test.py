@@ -0,0 +1,58 @@
+import unittest
+
+from branch.branch import Branch
+from branch.branch import Stage
+from branch.commit import Commit
+from branch.renderer import TreeRenderer
+from branch.tree import Tree
+
+
+class TreeRendererTest(unittest.TestCase):
+
+    def branch(self, ref, names, commits=[], children=[]):
+        branch = Branch(ref, names, [Commit(c, 'Message') for c in commits])
+        for child in children:
+            branch.children[child.ref] = child
+        return branch
+
+    def render(self, root):
+        tree = Tree(root.ref, root.ref, {root.ref: root})
+        return list(TreeRenderer().render_tree(tree))
+
+    def test_children_are_rendered_above_their_parent(self):
+        fix = self.branch('c3', ['fix'], ['c3'])
+        feature = self.branch('c2', ['feature'], ['c2'], [fix])
+        other = self.branch('c4', ['other'], ['c4'])
+        root = self.branch('c1', ['master'], ['c1'], [feature, other])
+        root.stage = Stage(True, False, False)
+
+        self.assertEqual(self.render(root), [
+            '       .-> [ fix ]',
+            '       |     (c3) Message',
+            '   .-> [ feature ]',
+            '   |     (c2) Message',
+            '   +-> [ other ]',
+            '   |     (c4) Message',
+            '   [*master*]',
+            '     (staged changes) ',
+            '     (c1) Message'
+        ])
+
+    def test_aliases_that_do_not_fit_are_counted(self):
+        names = ['master'] + ['alias-{:02}'.format(i) for i in range(20)]
+        line, = self.render(self.branch('c1', names))
+
+        self.assertLessEqual(len(line), 80)
+        self.assertTrue(line.startswith('   [*master*][ alias-'))
+        self.assertTrue(line.endswith('[ +16 more ]'))
+
+    def test_deep_stacks(self):
+        root = branch = self.branch('b0', ['b0'])
+        for i in range(1, 5000):
+            child = self.branch('b{}'.format(i), ['b{}'.format(i)])
+            branch.children[child.ref] = child
+            branch = child
+
+        lines = self.render(root)
+        self.assertEqual(len(lines), 5000)
+        self.assertEqual(lines[-1], '   [*b0*]')
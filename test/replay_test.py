@@ -0,0 +1,86 @@
+import os
+import unittest
+from subprocess import CalledProcessError
+
+from branch.git import Git
+from branch.replay import InMemoryRebase
+from test.doubles import RecordingDisplay
+from test.repository import Repository
+
+
+class InMemoryRebaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.origin = Repository()
+        self.origin.commit('initial')
+        self.origin.commit('release')
+
+    def tearDown(self):
+        self.origin.close()
+
+    def build(self, repository):
+        for name, parent in (('one', 'master'), ('two', 'one'),
+                             ('three', 'master')):
+            repository.checkout(parent)
+            repository.git('checkout', '--quiet', '-b', name)
+            repository.commit(name)
+
+    def is_ancestor(self, repository, ancestor, descendant):
+        try:
+            repository.git('merge-base', '--is-ancestor', ancestor, descendant)
+        except CalledProcessError:
+            return False
+        return True
+
+    def test_replays_without_checkouts(self):
+        with Repository(self.origin) as repository:
+            self.build(repository)
+            repository.checkout('two')
+            tree = Git().tree(False)
+            self.origin.commit('fix')
+            one = repository.git('rev-parse', 'one')
+
+            InMemoryRebase(Git(), RecordingDisplay()).run(tree.root)
+
+            self.assertEqual(
+                repository.git('rev-parse', 'master'),
+                self.origin.head())
+            for parent, child in (('master', 'one'), ('one', 'two'),
+                                  ('master', 'three')):
+                self.assertTrue(self.is_ancestor(repository, parent, child))
+            self.assertNotEqual(repository.git('rev-parse', 'one'), one)
+            self.assertEqual(
+                repository.git('symbolic-ref', '--short', 'HEAD'), 'two')
+            self.assertEqual(repository.git('status', '--porcelain'), '')
+            self.assertTrue(os.path.exists('fix'))
+            self.assertEqual(
+                repository.git('log', '-1', '--format=%s', 'two', '--'), 'two')
+
+    def test_branches_already_up_to_date_are_kept(self):
+        with Repository(self.origin) as repository:
+            self.build(repository)
+            tree = Git().tree(False)
+            before = repository.git('rev-parse', 'two')
+
+            InMemoryRebase(Git(), RecordingDisplay()).run(tree.root)
+
+            self.assertEqual(repository.git('rev-parse', 'two'), before)
+
+    def test_conflicts_fall_back_to_rebase(self):
+        with Repository(self.origin) as repository:
+            self.build(repository)
+            repository.checkout('master')
+            tree = Git().tree(False)
+            self.origin.commit('conflict', file='three')
+
+            with self.assertRaises(CalledProcessError):
+                InMemoryRebase(Git(), RecordingDisplay()).run(tree.root)
+
+            self.assertEqual(
+                repository.git('rev-parse', 'master'),
+                self.origin.head())
+            self.assertTrue(self.is_ancestor(repository, 'master', 'one'))
+            self.assertTrue(self.is_ancestor(repository, 'one', 'two'))
+            self.assertFalse(self.is_ancestor(repository, 'master', 'three'))
+            self.assertTrue(
+                os.path.isdir(os.path.join('.git', 'rebase-merge')))
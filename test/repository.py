@@ -0,0 +1,76 @@
+import os
+import tempfile
+
+from subprocess import PIPE
+from subprocess import run
+
+
+ENVIRONMENT = {
+    'GIT_AUTHOR_NAME': 'Branch',
+    'GIT_AUTHOR_EMAIL': 'branch@example.com',
+    'GIT_COMMITTER_NAME': 'Branch',
+    'GIT_COMMITTER_EMAIL': 'branch@example.com',
+    'GIT_CONFIG_NOSYSTEM': '1'
+}
+
+
+class Repository:
+
+    time = 1500000000
+
+    def __init__(self, origin=None):
+        self._directory = tempfile.TemporaryDirectory()
+        self._cwd = None
+        if origin is None:
+            self.git('init', '--quiet', '--initial-branch=master')
+        else:
+            self.git('clone', '--quiet', 'file://' + origin.path, '.')
+        self.git('config', 'user.name', ENVIRONMENT['GIT_AUTHOR_NAME'])
+        self.git('config', 'user.email', ENVIRONMENT['GIT_AUTHOR_EMAIL'])
+
+    @property
+    def path(self):
+        return self._directory.name
+
+    def __enter__(self):
+        self._cwd = os.getcwd()
+        os.chdir(self.path)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        os.chdir(self._cwd)
+        self.close()
+
+    def close(self):
+        self._directory.cleanup()
+
+    def git(self, *command):
+        environment = dict(os.environ)
+        environment.update(ENVIRONMENT)
+        environment['HOME'] = self.path
+        Repository.time += 60
+        environment['GIT_AUTHOR_DATE'] = '@{} +0000'.format(Repository.time)
+        environment['GIT_COMMITTER_DATE'] = \
+            '@{} +0000'.format(Repository.time)
+        process = run(
+            ('git',) + command, cwd=self.path, env=environment,
+            stdout=PIPE, stderr=PIPE)
+        process.check_returncode()
+        return process.stdout.decode('utf-8').strip()
+
+    def commit(self, message, file=None):
+        file = file or message
+        with open(os.path.join(self.path, file), 'w') as stream:
+            stream.write(message + '\n')
+        self.git('add', '--all')
+        self.git('commit', '--quiet', '--message', message)
+        return self.git('rev-parse', 'HEAD')
+
+    def branch(self, name, start='HEAD'):
+        self.git('branch', name, start)
+
+    def checkout(self, name):
+        self.git('checkout', '--quiet', name)
+
+    def head(self):
+        return self.git('rev-parse', 'HEAD')
@@ -0,0 +1,71 @@
+import io
+import json
+import os
+import unittest
+from unittest import mock
+
+from branch import trace
+from branch.controller import FixedController
+from branch.engine import Engine
+from branch.git import Git
+from test.doubles import RecordingDisplay
+from test.repository import Repository
+
+
+class TraceTest(unittest.TestCase):
+
+    def tearDown(self):
+        trace.stop()
+
+    def test_disabled_spans_are_not_recorded(self):
+        with trace.span('read') as span:
+            span.set('entries', 1)
+        self.assertFalse(trace.is_enabled())
+
+    def test_records_spans_with_arguments(self):
+        tracer = trace.start()
+        with trace.span('read') as span:
+            span.add('entries', 2)
+            span.add('entries', 3)
+
+        span, = tracer.spans
+        self.assertEqual(span.name, 'read')
+        self.assertEqual(span.args, {'entries': 5})
+        self.assertGreaterEqual(span.wall, 0)
+        self.assertIn('entries=5', tracer.summary()[0])
+
+    def test_engine_writes_chrome_trace(self):
+        with Repository() as repository:
+            repository.commit('initial')
+            path = os.path.join(repository.path, 'trace.json')
+            trace.start(path)
+            Engine(
+                Git(), RecordingDisplay(),
+                FixedController(None, {'commits': True})
+            ).run()
+            trace.stop()
+
+            with open(path, 'r') as file:
+                events = json.load(file)['traceEvents']
+
+        names = {event['name'] for event in events}
+        self.assertTrue({'tree', 'read', 'build', 'render', 'git'} <= names)
+        commands = [
+            event['args']['argv'] for event in events if event['name'] == 'git']
+        self.assertIn(['git', 'diff', '--quiet'], commands)
+        self.assertTrue(all(event['ph'] == 'X' for event in events))
+
+    def test_trace_flag_enables_tracing(self):
+        with Repository() as repository:
+            repository.commit('initial')
+            Engine(
+                Git(), RecordingDisplay(),
+                FixedController(None, {'trace': True})
+            ).run()
+            self.assertTrue(trace.is_enabled())
+            with mock.patch('sys.stderr', new=io.StringIO()) as stderr:
+                trace.stop()
+
+        lines = stderr.getvalue().splitlines()
+        self.assertTrue(all(line.startswith('[ TRACE ]') for line in lines))
+        self.assertIn('peak memory', lines[-1])
@@ -0,0 +1,76 @@
+import threading
+import unittest
+from unittest import mock
+
+from branch.git import Git
+from test.repository import Repository
+
+
+class GitTreeTest(unittest.TestCase):
+
+    def describe(self, tree):
+        return {
+            branch.ref: (sorted(branch.names), sorted(branch.children.keys()))
+            for branch
+            in tree.branches
+        }
+
+    def build(self, repository):
+        repository.commit('initial')
+        repository.commit('release')
+        repository.branch('feature')
+        repository.commit('fix')
+        repository.branch('fixes')
+        repository.checkout('feature')
+        repository.commit('feature')
+        repository.checkout('fixes')
+        repository.commit('another fix')
+
+    def test_bounded_tree_matches_full_tree(self):
+        with Repository() as repository:
+            self.build(repository)
+            self.assertEqual(
+                self.describe(Git().tree(False, bounded=True)),
+                self.describe(Git().tree(False)))
+
+    def test_bounded_walk_stops_at_merge_base(self):
+        with Repository() as repository:
+            self.build(repository)
+            root = repository.git('rev-parse', 'master~1')
+            log = Git._log
+            walks = []
+
+            def spy(git, include=None, exclude=()):
+                walks.append(list(exclude))
+                return log(git, include, exclude)
+
+            with mock.patch.object(Git, '_log', spy):
+                tree = Git().tree(False, bounded=True)
+
+            self.assertEqual(walks, [[root + '^@']])
+            self.assertEqual(tree.root.ref, root)
+
+    def test_stage_is_read_alongside_history(self):
+        with Repository() as repository:
+            self.build(repository)
+            with open('untracked', 'w') as file:
+                file.write('untracked')
+            has_changes, has_untracked = Git._has_changes, Git._has_untracked
+            threads = []
+
+            def changes_spy(git, *command):
+                threads.append(threading.current_thread())
+                return has_changes(git, *command)
+
+            def untracked_spy(git):
+                threads.append(threading.current_thread())
+                return has_untracked(git)
+
+            with mock.patch.object(Git, '_has_changes', changes_spy), \
+                    mock.patch.object(Git, '_has_untracked', untracked_spy):
+                tree = Git().tree(False)
+
+            self.assertTrue(tree.head.stage.untracked)
+            self.assertFalse(tree.head.stage.staged)
+            self.assertEqual(len(threads), 3)
+            self.assertNotIn(threading.current_thread(), threads)
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+
+from branch.workspace import Workspace
+from test.doubles import RecordingDisplay
+from test.repository import Repository
+
+
+class WorkspaceTest(unittest.TestCase):
+
+    def test_finds_repositories_below_workspace(self):
+        with Repository() as first, Repository() as second:
+            with tempfile.TemporaryDirectory() as directory:
+                os.symlink(first.path, os.path.join(directory, 'b'))
+                os.symlink(second.path, os.path.join(directory, 'a'))
+                os.mkdir(os.path.join(directory, 'other'))
+
+                self.assertEqual(
+                    Workspace.find([directory]),
+                    [os.path.join(directory, 'a'), os.path.join(directory, 'b')])
+                self.assertEqual(Workspace.find([first.path]), [first.path])
+
+    def test_renders_every_repository(self):
+        with Repository() as first, Repository() as second:
+            first.commit('initial')
+            first.branch('first')
+            second.commit('initial')
+            second.branch('second')
+
+            display = RecordingDisplay()
+            Workspace(display, [first.path, second.path], 2).run(None, {})
+
+        self.assertEqual(
+            sorted(display.renderings),
+            [['   [*master*][ first ]'], ['   [*master*][ second ]']])
+        self.assertEqual(
+            display.messages[-1], 'Finished 2 repositories, 0 failed.')
+
+    def test_applies_commands_to_every_repository(self):
+        with Repository() as first, Repository() as second:
+            for repository in [first, second]:
+                repository.commit('initial')
+                repository.branch('alias')
+
+            display = RecordingDisplay()
+            Workspace(display, [first.path, second.path]).run('wipe', {})
+
+            for repository in [first, second]:
+                self.assertEqual(
+                    repository.git('branch', '--format=%(refname:short)'),
+                    'master')
+        self.assertEqual(display.messages.count('  Success.'), 2)
+
+    def test_reports_failed_repositories(self):
+        with Repository() as repository, tempfile.TemporaryDirectory() as path:
+            repository.commit('initial')
+            with open(os.path.join(path, '.git'), 'w') as file:
+                file.write('gitdir: missing\n')
+
+            display = RecordingDisplay()
+            Workspace(display, [repository.path, path]).run(None, {})
+
+        self.assertEqual(len(display.renderings), 1)
+        self.assertEqual(
+            display.messages[-1], 'Finished 2 repositories, 1 failed.')
+
+    def test_reports_missing_workspaces(self):
+        with tempfile.TemporaryDirectory() as path:
+            missing = os.path.join(path, 'missing')
+            display = RecordingDisplay()
+            Workspace(display, [missing]).run(None, {})
+
+        self.assertEqual(
+            display.messages,
+            ["Cannot read the workspace '{}': No such file or directory."
+             .format(missing)])
+
+    def test_rejects_watch_mode(self):
+        display = RecordingDisplay()
+        Workspace(display, []).run(None, {'watch': True})
+        self.assertEqual(
+            display.messages, ['This command runs in a single repository only.'])